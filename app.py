@@ -1,91 +1,395 @@
-from flask import Flask, request, jsonify
+import json
+import queue
 import sqlite3
 from datetime import datetime
+from functools import wraps
+
+from flask import Flask, Response, request, jsonify, stream_with_context
+
+import archive
+import db
+import export
+import journal
+import metrics
+import replica
+import reports
+from events import broadcaster
+from idempotency import recent_keys, submit_order_once, valid_key
+from live_orders import live_orders, replica_live_orders
+from menu import menu_cache, validate_order
+from scheduler import eta_fields, queue_scheduler
 
 app = Flask(__name__)
-DATABASE = 'database.db'
-
-# --- Helper Function: Connect to DB ---
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-# --- Initialize DB Schema ---
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS orders (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customer_name TEXT NOT NULL,
-            drink_type TEXT NOT NULL,
-            milk_type TEXT,
-            flavors TEXT,
-            pickup_time TEXT,
-            status TEXT DEFAULT 'pending',
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+
+# --- Create/upgrade the schema of every site's shard (once per process) ---
+db.migrate_all()
+
+# --- Move old closed orders to the monthly archive tables (hourly) ---
+archive.start_background()
+
+# --- Keep each site's read replica within db.REPLICA_MAX_STALENESS ---
+replica.start_background()
+
+# --- Journal every committed order mutation (see journal.py) ---
+journal.start()
+
+# --- Site routing: X-Coffee-Site header or ?site=, default site otherwise ---
+# site=all is only meaningful for the reports, which fan out to every shard
+ALL_SITES = 'all'
+
+def requested_site():
+    return request.headers.get('X-Coffee-Site') or request.args.get('site') or db.DEFAULT_SITE
+
+@app.before_request
+def select_site():
+    site = requested_site()
+    if site == ALL_SITES and request.path.startswith('/reports/'):
+        site = db.DEFAULT_SITE
+    elif site not in db.sites():
+        return jsonify({'error': f'Unknown site: {site}'}), 404
+    db.set_site(site)
+
+def all_sites_requested():
+    return requested_site() == ALL_SITES
+
+# --- Read-only endpoints: served from the replica while it is fresh enough ---
+def from_replica(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with db.use_replica():
+            return view(*args, **kwargs)
+    return wrapper
+
+def replica_stream(chunks):
+    # Streamed bodies run after the view returns; keep its site and routing
+    site = db.current_site()
+    def generate():
+        with db.use_site(site), db.use_replica():
+            yield from chunks
+    return generate()
+
+# --- Error handler: lock contention is retryable, not a server bug ---
+@app.errorhandler(sqlite3.OperationalError)
+def database_busy(error):
+    if 'locked' not in str(error) and 'busy' not in str(error):
+        raise error
+    return jsonify({'error': 'Database busy, please retry'}), 503, {'Retry-After': '1'}
 
 # --- Endpoint: Create Order ---
 @app.route('/order', methods=['POST'])
+@metrics.instrumented('create_order')
 def create_order():
-    data = request.get_json()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+
+    # Checked against the in-memory menu index, not the database
+    errors = validate_order(data)
+    if errors:
+        return jsonify({'error': errors[0], 'errors': errors}), 400
 
-    required_fields = ['customer_name', 'drink_type']
-    for field in required_fields:
-        if field not in data:
-            return jsonify({'error': f'Missing required field: {field}'}), 400
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        INSERT INTO orders (customer_name, drink_type, milk_type, flavors, pickup_time)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (
+    # Retries with the same key get the original order back, not a new one
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if not valid_key(idempotency_key):
+        return jsonify({'error': 'Idempotency key must be a string of at most 255 characters'}), 400
+
+    order_id, replayed = submit_order_once(
+        idempotency_key,
         data.get('customer_name'),
         data.get('drink_type'),
-        data.get('milk_type'),
-        data.get('flavors'),
-        data.get('pickup_time')
-    ))
-    conn.commit()
-    order_id = cursor.lastrowid
-    conn.close()
+        milk_type=data.get('milk_type'),
+        flavors=data.get('flavors'),
+        drizzle_type=data.get('drizzle_type'),
+        pickup_time=data.get('pickup_time'),
+    )
+    if not replayed:
+        broadcaster.notify()
+
+    body = {'message': 'Order created', 'order_id': order_id, **eta_fields(order_id)}
+    return jsonify(body), 201, {'Idempotent-Replayed': 'true' if replayed else 'false'}
+
+# --- Endpoint: Create a group/family order in one transaction ---
+# Body: {"orders": [{customer_name, drink_type, milk_type, flavors, drizzle_type}, ...]}
+MAX_BATCH_SIZE = 50
 
-    return jsonify({'message': 'Order created', 'order_id': order_id}), 201
+@app.route('/orders/batch', methods=['POST'])
+def create_orders_batch():
+    data = request.get_json(silent=True) or {}
+    lines = data.get('orders')
+    if not isinstance(lines, list) or not lines:
+        return jsonify({'error': 'orders must be a non-empty list'}), 400
+    if len(lines) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} orders per batch'}), 400
 
-# --- Endpoint: Get All Orders ---
+    results = []
+    valid = []
+    for index, line in enumerate(lines):
+        errors = validate_order(line) if isinstance(line, dict) else ['Each order must be an object']
+        if errors:
+            results.append({'index': index, 'errors': errors})
+        else:
+            results.append({'index': index})
+            valid.append((index, line))
+
+    # Only the order fields go through; the server stamps the time
+    order_ids = db.insert_orders([
+        {field: line.get(field) for field in db.ORDER_FIELDS} for _, line in valid
+    ])
+    for (index, _), order_id in zip(valid, order_ids):
+        results[index]['order_id'] = order_id
+        results[index].update(eta_fields(order_id))
+    if order_ids:
+        broadcaster.notify()
+
+    status = 201 if order_ids else 400
+    return jsonify({'created': len(order_ids), 'results': results}), status
+
+# --- Endpoint: Get Orders (optionally filtered/paginated) ---
+# Query params: status=active|pending,ready  start/end=YYYY-MM-DD HH:MM:SS (UTC)
+#               limit, offset
+#               since=<cursor> returns only rows changed after the cursor
 @app.route('/orders', methods=['GET'])
+@metrics.instrumented('get_orders')
+@from_replica
 def get_orders():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM orders ORDER BY timestamp DESC')
-    rows = cursor.fetchall()
-    conn.close()
+    if 'since' in request.args:
+        return get_order_changes()
+
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if (limit is not None and limit < 0) or offset < 0:
+        return jsonify({'error': 'limit and offset must be non-negative'}), 400
+
+    statuses = db.parse_statuses(request.args.get('status'))
+    start, end = request.args.get('start'), request.args.get('end')
+    if statuses == db.ACTIVE_STATUSES and start is None and end is None:
+        # The live board: served from the replica-fed in-memory store, not SQLite
+        orders = replica_live_orders.active()
+        orders = orders[offset:offset + limit] if limit is not None else orders[offset:]
+        return jsonify([order.as_dict() for order in orders])
 
+    rows = db.fetch_orders(statuses=statuses, start=start, end=end, limit=limit, offset=offset)
     orders = [dict(row) for row in rows]
     return jsonify(orders)
 
+# --- Incremental feed: GET /orders?since=<cursor> ---
+def get_order_changes():
+    since = request.args.get('since', type=int)
+    limit = request.args.get('limit', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': 'since must be a non-negative integer cursor'}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({'error': 'limit must be positive'}), 400
+
+    rows, cursor = db.fetch_changes(since, limit=limit)
+    return jsonify({'orders': [dict(row) for row in rows], 'cursor': cursor})
+
 # --- Endpoint: Update Order Status ---
 @app.route('/order/<int:order_id>', methods=['PATCH'])
+@metrics.instrumented('update_order')
 def update_order(order_id):
     data = request.get_json()
     if 'status' not in data:
         return jsonify({'error': 'Missing status field'}), 400
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE orders SET status = ? WHERE id = ?', (data['status'], order_id))
-    conn.commit()
-    conn.close()
+    db.set_order_status(order_id, data['status'])
+    broadcaster.notify()
 
     return jsonify({'message': 'Order status updated'})
 
-# --- Initialize DB on First Run ---
+# --- Endpoint: Streaming export ---
+# Query params: format=csv|parquet, status, start, end (same as /orders)
+@app.route('/orders/export', methods=['GET'])
+def export_orders():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in export.EXPORT_FORMATS:
+        return jsonify({'error': f'Unsupported format: {export_format}'}), 400
+    if export_format == 'parquet' and not export.parquet_available():
+        return jsonify({'error': 'Parquet export needs pyarrow installed'}), 501
+
+    mimetype, extension = export.EXPORT_FORMATS[export_format]
+    chunks = export.iter_export(
+        export_format,
+        statuses=db.parse_statuses(request.args.get('status')),
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+    )
+    return Response(
+        stream_with_context(replica_stream(chunks)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=orders.{extension}'},
+    )
+
+# --- Endpoint: Bulk status transitions ---
+# Body: {"updates": [{"id": 1, "status": "ready", "version": 12}, ...]}
+# "version" is the order's change_seq as last seen by the client; stale
+# versions are reported as conflicts instead of overwriting another barista.
+@app.route('/orders', methods=['PATCH'])
+def update_orders():
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    if not isinstance(updates, list) or not updates:
+        return jsonify({'error': 'updates must be a non-empty list'}), 400
+
+    for update in updates:
+        if not isinstance(update, dict) or not isinstance(update.get('id'), int):
+            return jsonify({'error': 'Each update needs an integer id'}), 400
+        if update.get('status') not in db.ORDER_STATUSES:
+            return jsonify({'error': f"Invalid status for order {update['id']}"}), 400
+        if update.get('version') is not None and not isinstance(update['version'], int):
+            return jsonify({'error': f"Invalid version for order {update['id']}"}), 400
+
+    results = db.set_order_statuses(updates)
+    if any(result['outcome'] == 'updated' for result in results):
+        broadcaster.notify()
+
+    return jsonify({'results': results})
+
+# --- Live order board: Server-Sent Events ---
+KEEPALIVE_SECONDS = 15
+
+def sse_message(event, data, event_id=None):
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
+
+@app.route('/orders/stream', methods=['GET'])
+def stream_orders():
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('since')
+    site = db.current_site()
+    subscriber = broadcaster.subscribe()
+
+    def generate():
+        try:
+            db.set_site(site)
+            # Resume from the client's cursor, or start from the active board
+            if last_id is not None and last_id.isdigit():
+                rows, sent = db.fetch_changes(int(last_id))
+                if rows:
+                    yield sse_message('orders', [dict(row) for row in rows], sent)
+            else:
+                rows, sent = db.fetch_active_with_cursor()
+                yield sse_message('snapshot', [dict(row) for row in rows], sent)
+
+            # Ends when the broadcaster drops this subscriber for falling behind;
+            # EventSource reconnects and the next request resumes from `sent`
+            while not subscriber.dropped:
+                try:
+                    orders = subscriber.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                orders = [o for o in orders if o['change_seq'] > sent]
+                if orders:
+                    sent = orders[-1]['change_seq']
+                    yield sse_message('orders', orders, sent)
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+# --- Live order board: lightweight display page ---
+@app.route('/display', methods=['GET'])
+def order_display():
+    return app.send_static_file('display.html')
+
+# --- Endpoint: Barista queue in suggested make order, with ETAs ---
+@app.route('/queue', methods=['GET'])
+def get_queue():
+    entries = queue_scheduler.snapshot()
+    for entry in entries:
+        entry['estimated_ready'] = entry['estimated_ready'].strftime('%Y-%m-%dT%H:%M:%SZ')
+    return jsonify(entries)
+
+# --- Endpoints: Reports from the precomputed rollups ---
+# Query params: start/end=YYYY-MM-DD (UTC days, inclusive)
+def report_days():
+    days = []
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        if value is not None:
+            try:
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                raise ValueError(f'{name} must be YYYY-MM-DD')
+        days.append(value)
+    return days
+
+@app.route('/reports/daily', methods=['GET'])
+@from_replica
+def get_daily_report():
+    try:
+        start, end = report_days()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    if all_sites_requested():
+        return jsonify(reports.daily_orders_all_sites(start, end))
+    return jsonify(reports.daily_orders(start, end))
+
+@app.route('/reports/busiest-intervals', methods=['GET'])
+@from_replica
+def get_busiest_intervals():
+    try:
+        start, end = report_days()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    limit = request.args.get('limit', default=10, type=int)
+    if limit <= 0:
+        return jsonify({'error': 'limit must be positive'}), 400
+    busiest = reports.busiest_intervals_all_sites if all_sites_requested() else reports.busiest_intervals
+    return jsonify({
+        'interval_minutes': db.ROLLUP_INTERVAL_MINUTES,
+        'intervals': busiest(start, end, limit),
+    })
+
+# field=milk_type (default) | drink_type | flavors | drizzle_type
+@app.route('/reports/usage-trend', methods=['GET'])
+@from_replica
+def get_usage_trend():
+    try:
+        start, end = report_days()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
+    field = request.args.get('field', 'milk_type')
+    if field not in db.USAGE_FIELDS:
+        return jsonify({'error': f'field must be one of: {", ".join(db.USAGE_FIELDS)}'}), 400
+    trend = reports.usage_trend_all_sites if all_sites_requested() else reports.usage_trend
+    return jsonify({'field': field, 'days': trend(field, start, end)})
+
+# --- Endpoint: Cache/pool counters ---
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    return jsonify({
+        'site': db.current_site(),
+        'sites': db.sites(),
+        'pool': db.pool_stats(),
+        'menu_cache': menu_cache.stats(),
+        'broadcaster': broadcaster.stats(),
+        'idempotency_keys': recent_keys.stats(),
+        'live_orders': live_orders.stats(),
+        'replica_live_orders': replica_live_orders.stats(),
+        'replica': replica.replica_status(),
+        'journal': journal.journal.stats(),
+    })
+
+# --- Endpoint: Prometheus metrics (request timings, query timings, pool) ---
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    gauges = {
+        f'coffee_pool_{name}': (f'Connection pool {name.replace("_", " ")}', value)
+        for name, value in db.pool_stats().items()
+    }
+    gauges['coffee_sse_subscribers'] = ('Open /orders/stream connections', broadcaster.stats()['subscribers'])
+    replica_age = db.get_shard().replica_age()
+    if replica_age is not None:
+        gauges['coffee_replica_age_seconds'] = ('Seconds since the read replica last matched the primary', replica_age)
+    return Response(metrics.render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+
+# --- Run the development server ---
 if __name__ == '__main__':
-    init_db()
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
@@ -0,0 +1,157 @@
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import db
+
+# Closed orders older than this move out of the live table, which then holds
+# about one service's worth of rows. 0 turns off the automatic runs.
+ARCHIVE_AFTER_HOURS = float(os.environ.get("COFFEE_ARCHIVE_AFTER_HOURS", "24"))
+ARCHIVE_INTERVAL_SECONDS = 3600
+
+_MONTH = re.compile(r"^\d{4}-\d{2}$")
+
+
+def archive_table_name(month):
+    return f"orders_archive_{month.replace('-', '_')}"
+
+
+def _month_bounds(month):
+    year, mon = (int(part) for part in month.split("-"))
+    following = f"{year + 1}-01" if mon == 12 else f"{year}-{mon + 1:02d}"
+    return f"{month}-01 00:00:00", f"{following}-01 00:00:00"
+
+
+def _ensure_archive_table(conn, month):
+    table = archive_table_name(month)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id INTEGER PRIMARY KEY,
+            customer_name TEXT NOT NULL,
+            drink_type TEXT NOT NULL,
+            milk_type TEXT,
+            flavors TEXT,
+            pickup_time TEXT,
+            status TEXT,
+            timestamp DATETIME,
+            drizzle_type TEXT,
+            change_seq INTEGER,
+            idempotency_key TEXT
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)")
+    conn.execute(
+        "INSERT OR IGNORE INTO order_archives (month, table_name) VALUES (?, ?)", (month, table)
+    )
+    return table
+
+
+# --- Move closed orders older than the cutoff, one month per transaction ---
+def archive_orders(older_than_hours=ARCHIVE_AFTER_HOURS, now=None):
+    cutoff = db.to_db_timestamp((now or datetime.utcnow()) - timedelta(hours=older_than_hours))
+    closed = ", ".join("?" for _ in db.CLOSED_STATUSES)
+    eligible = f"status IN ({closed}) AND timestamp < ?"
+
+    with db.connection() as conn:
+        months = [
+            row[0] for row in conn.execute(
+                f"SELECT DISTINCT substr(timestamp, 1, 7) FROM orders WHERE {eligible}",
+                (*db.CLOSED_STATUSES, cutoff),
+            )
+        ]
+
+    moved = {}
+    columns = ", ".join(db.ORDER_COLUMNS)
+    for month in sorted(m for m in months if m and _MONTH.match(m)):
+        with db.transaction() as conn:
+            table = _ensure_archive_table(conn, month)
+            in_month = f"{eligible} AND timestamp >= ? AND timestamp < ?"
+            params = (*db.CLOSED_STATUSES, cutoff, *_month_bounds(month))
+            conn.execute(
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM orders WHERE {in_month}",
+                params,
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO archived_idempotency_keys (idempotency_key, order_id) "
+                f"SELECT idempotency_key, id FROM orders WHERE {in_month} AND idempotency_key IS NOT NULL",
+                params,
+            )
+            # No delete trigger on orders, so usage counters keep these rows
+            count = conn.execute(f"DELETE FROM orders WHERE {in_month}", params).rowcount
+            conn.execute(f"""
+                UPDATE order_archives SET
+                    rows = (SELECT COUNT(*) FROM {table}),
+                    first_timestamp = (SELECT MIN(timestamp) FROM {table}),
+                    last_timestamp = (SELECT MAX(timestamp) FROM {table})
+                WHERE month = ?
+            """, (month,))
+        moved[month] = count
+    return moved
+
+
+def archive_status():
+    with db.connection() as conn:
+        live = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+        months = [dict(row) for row in conn.execute("SELECT * FROM order_archives ORDER BY month")]
+    return {"live_rows": live, "archives": months}
+
+
+# --- Automatic runs: one background thread per process ---
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _run_forever(interval):
+    while True:
+        for site in db.sites():
+            try:
+                with db.use_site(site):
+                    archive_orders()
+            except sqlite3.OperationalError:
+                # Busy or locked: the next pass picks the rows up
+                pass
+        time.sleep(interval)
+
+
+def start_background(interval=ARCHIVE_INTERVAL_SECONDS):
+    global _thread
+    if ARCHIVE_AFTER_HOURS <= 0:
+        return
+    with _thread_lock:
+        if _thread is None:
+            _thread = threading.Thread(
+                target=_run_forever, args=(interval,), name="order-archiver", daemon=True
+            )
+            _thread.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed orders into per-month tables")
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--older-than-hours", type=float, default=ARCHIVE_AFTER_HOURS)
+    parser.add_argument("--site", choices=db.sites(), default=db.DEFAULT_SITE)
+    args = parser.parse_args()
+
+    db.set_site(args.site)
+    db.migrate()
+    if args.command == "run":
+        moved = archive_orders(args.older_than_hours)
+        for month, count in moved.items():
+            print(f"{month}: archived {count} orders")
+        print(f"{sum(moved.values())} orders archived")
+        return 0
+
+    status = archive_status()
+    print(f"live orders: {status['live_rows']}")
+    for month in status["archives"]:
+        print(f"{month['month']}: {month['rows']} orders in {month['table_name']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+import archive
+import db
+import journal
+import metrics
+import replica
+from events import broadcaster
+from idempotency import recent_keys, valid_key
+from live_orders import live_orders, replica_live_orders
+from menu import menu_cache, validate_order
+from scheduler import eta_fields
+
+# Asyncio variant of the order API (app.py). Handlers never write to SQLite
+# themselves: writes are queued to a single writer task that group-commits
+# everything that arrived within GROUP_COMMIT_WINDOW in one transaction, so
+# concurrent POSTs never contend for the write lock. Reads run on a thread
+# pool whose threads only use db's read-only connection pool. It serves the
+# default site only (db.DEFAULT_SITE); multi-site routing lives in app.py.
+#
+#   uvicorn async_app:app --port 5001
+
+GROUP_COMMIT_WINDOW = 0.002
+GROUP_COMMIT_MAX = 256
+
+# --- Create/upgrade the shared schema (once per process) ---
+db.migrate()
+
+
+# --- Single writer: one thread, one transaction per group of queued writes ---
+class GroupCommitWriter:
+    def __init__(self, window=GROUP_COMMIT_WINDOW, max_batch=GROUP_COMMIT_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = None
+        self.task = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-writer')
+        self.groups = 0
+        self.writes = 0
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, fn, *args):
+        # Resolves with fn's return value once its group has committed
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, args, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(group) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    group.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                outcomes = await loop.run_in_executor(self.executor, self.commit_group, group)
+            except Exception as error:
+                # The whole group rolled back (e.g. the database stayed locked)
+                outcomes = [(False, error)] * len(group)
+            for (_, _, future), (ok, value) in zip(group, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            self.groups += 1
+            self.writes += len(group)
+            broadcaster.notify()
+
+    def commit_group(self, group):
+        # db helpers nest inside the open transaction; a savepoint per write
+        # lets one bad write fail alone without losing the rest of the group
+        outcomes = []
+        with metrics.operation('group_commit'), db.transaction() as conn:
+            for fn, args, _ in group:
+                conn.execute('SAVEPOINT write')
+                try:
+                    outcomes.append((True, fn(*args)))
+                except Exception as error:
+                    conn.execute('ROLLBACK TO write')
+                    outcomes.append((False, error))
+                conn.execute('RELEASE write')
+        return outcomes
+
+    def stats(self):
+        return {
+            'groups': self.groups,
+            'writes': self.writes,
+            'queued': self.queue.qsize() if self.queue else 0,
+            'avg_group_size': round(self.writes / self.groups, 2) if self.groups else 0,
+        }
+
+
+writer = GroupCommitWriter()
+readers = ThreadPoolExecutor(
+    max_workers=db.READ_POOL_SIZE, thread_name_prefix='order-reader', initializer=db.use_read_pool
+)
+
+
+async def read(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(readers, fn, *args)
+
+
+def from_replica(fn, *args):
+    # Run on a reader thread: fn's reads go to the replica while it is fresh
+    with db.use_replica():
+        return fn(*args)
+
+
+async def json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+# --- Error handler: lock contention is retryable, not a server bug ---
+async def database_busy(request, error):
+    if 'locked' not in str(error) and 'busy' not in str(error):
+        raise error
+    return JSONResponse({'error': 'Database busy, please retry'}, 503, {'Retry-After': '1'})
+
+
+# --- Endpoint: Create Order ---
+async def create_order(request):
+    data = await json_body(request)
+    if not isinstance(data, dict):
+        return JSONResponse({'error': 'Expected a JSON object'}, 400)
+
+    # Validation is an in-memory lookup; the index's periodic menu_version
+    # recheck is a query, so it runs on a reader thread, not the event loop
+    if menu_cache.index_stale():
+        await read(menu_cache.refresh)
+    errors = validate_order(data)
+    if errors:
+        return JSONResponse({'error': errors[0], 'errors': errors}, 400)
+
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    if not valid_key(idempotency_key):
+        return JSONResponse({'error': 'Idempotency key must be a string of at most 255 characters'}, 400)
+
+    # Recent retries are answered from memory without queueing a write
+    order_id = recent_keys.get(idempotency_key) if idempotency_key else None
+    replayed = order_id is not None
+    if not replayed:
+        order_id, created = await writer.submit(
+            db.insert_order_once,
+            idempotency_key,
+            data.get('customer_name'),
+            data.get('drink_type'),
+            data.get('milk_type'),
+            data.get('flavors'),
+            data.get('drizzle_type'),
+            data.get('pickup_time'),
+        )
+        replayed = not created
+        if idempotency_key:
+            recent_keys.put(idempotency_key, order_id)
+    eta = await read(eta_fields, order_id)
+    return JSONResponse(
+        {'message': 'Order created', 'order_id': order_id, **eta}, 201,
+        {'Idempotent-Replayed': 'true' if replayed else 'false'},
+    )
+
+
+# --- Endpoint: Get Orders (same filters as app.py) ---
+async def get_orders(request):
+    params = request.query_params
+    try:
+        limit = int(params['limit']) if 'limit' in params else None
+        offset = int(params.get('offset', 0))
+    except ValueError:
+        return JSONResponse({'error': 'limit and offset must be integers'}, 400)
+    if (limit is not None and limit < 0) or offset < 0:
+        return JSONResponse({'error': 'limit and offset must be non-negative'}, 400)
+
+    statuses = db.parse_statuses(params.get('status'))
+    if statuses == db.ACTIVE_STATUSES and 'start' not in params and 'end' not in params:
+        # The live board: served from the replica-fed in-memory store, not SQLite
+        orders = await read(replica_live_orders.active)
+        orders = orders[offset:offset + limit] if limit is not None else orders[offset:]
+        return JSONResponse([order.as_dict() for order in orders])
+
+    rows = await read(
+        from_replica,
+        db.fetch_orders,
+        statuses,
+        params.get('start'),
+        params.get('end'),
+        limit,
+        offset,
+    )
+    return JSONResponse([dict(row) for row in rows])
+
+
+# --- Endpoint: Update Order Status ---
+async def update_order(request):
+    data = await json_body(request)
+    if not isinstance(data, dict) or 'status' not in data:
+        return JSONResponse({'error': 'Missing status field'}, 400)
+
+    await writer.submit(db.set_order_status, request.path_params['order_id'], data['status'])
+    return JSONResponse({'message': 'Order status updated'})
+
+
+# --- Endpoint: Writer/pool counters ---
+async def get_stats(request):
+    return JSONResponse({
+        'writer': writer.stats(),
+        'pool': db.pool_stats(),
+        'read_pool': db.get_read_pool().stats(),
+        'idempotency_keys': recent_keys.stats(),
+        'live_orders': live_orders.stats(),
+        'replica_live_orders': replica_live_orders.stats(),
+        'journal': journal.journal.stats(),
+    })
+
+
+# --- Endpoint: Prometheus metrics ---
+async def get_metrics(request):
+    return PlainTextResponse(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await writer.start()
+    archive.start_background()
+    replica.start_background()
+    journal.start()
+    yield
+    await writer.stop()
+
+
+app = Starlette(
+    routes=[
+        Route('/order', create_order, methods=['POST']),
+        Route('/orders', get_orders, methods=['GET']),
+        Route('/order/{order_id:int}', update_order, methods=['PATCH']),
+        Route('/stats', get_stats, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+    ],
+    exception_handlers={sqlite3.OperationalError: database_busy},
+    lifespan=lifespan,
+)
+
+# --- Run the server ---
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, port=5001)
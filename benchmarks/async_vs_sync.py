@@ -0,0 +1,139 @@
+# Sync (app.py on Werkzeug threads) vs async (async_app.py on uvicorn with a
+# single group-committing writer) order API under concurrent clients.
+#
+# Each server runs in its own process on its own temp database. For every
+# client count, clients loop for --seconds doing mostly POST /order with some
+# GET /orders?status=active, and the script reports throughput, latency
+# percentiles and error/lock-error (503) rates per server.
+#
+#   python benchmarks/async_vs_sync.py [--clients 10 50 200] [--seconds 10] [--json out.json]
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from order_throughput import DRINKS, Recorder, free_port, git_revision, request, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CREATE_WEIGHT = 0.8
+
+
+def serve_sync(path, port):
+    os.environ["COFFEE_DATABASE"] = path
+    import logging
+    from werkzeug.serving import make_server
+
+    import app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", port, app.app, threaded=True).serve_forever()
+
+
+def serve_async(path, port):
+    os.environ["COFFEE_DATABASE"] = path
+    import uvicorn
+
+    import async_app
+    uvicorn.run(async_app.app, host="127.0.0.1", port=port, log_level="error",
+                access_log=False, backlog=2048)
+
+
+def wait_for(port):
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def client(port, recorder, stop_at, seed):
+    rng = random.Random(seed)
+    while time.time() < stop_at:
+        if rng.random() < CREATE_WEIGHT:
+            drink, milk = rng.choice(DRINKS)
+            request(port, recorder, "POST", "/order", "POST /order", {
+                "customer_name": f"Guest {rng.randrange(10000)}",
+                "drink_type": drink,
+                "milk_type": milk,
+                "pickup_time": "ASAP",
+            })
+        else:
+            request(port, recorder, "GET", "/orders?status=active&limit=50", "GET /orders")
+
+
+def run_level(port, clients, seconds):
+    recorder = Recorder()
+    stop_at = time.time() + seconds
+    threads = [threading.Thread(target=client, args=(port, recorder, stop_at, n))
+               for n in range(clients)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+    all_latencies = [ms for values in recorder.latencies.values() for ms in values]
+    return {
+        "all": summarize(all_latencies, sum(recorder.errors.values()),
+                         sum(recorder.lock_errors.values()), elapsed),
+        **{
+            endpoint: summarize(values, recorder.errors[endpoint],
+                                recorder.lock_errors[endpoint], elapsed)
+            for endpoint, values in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync vs async order API under concurrency")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "async_vs_sync",
+        "git_revision": git_revision(),
+        "run_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "seconds": args.seconds,
+        "servers": {},
+    }
+    for name, target in (("sync", serve_sync), ("async", serve_async)):
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        port = free_port()
+        server = multiprocessing.Process(target=target, args=(path, port), daemon=True)
+        server.start()
+        wait_for(port)
+        results["servers"][name] = {
+            str(clients): run_level(port, clients, args.seconds) for clients in args.clients
+        }
+        server.terminate()
+        server.join()
+
+    print(f"{'server':<7} {'clients':>7} {'reqs':>7} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'lock%':>6}")
+    for name, levels in results["servers"].items():
+        for clients, endpoints in levels.items():
+            s = endpoints["all"]
+            if not s["requests"]:
+                continue
+            print(f"{name:<7} {clients:>7} {s['requests']:>7} {s['throughput_rps']:>8} {s['p50_ms']:>8} "
+                  f"{s['p95_ms']:>8} {s['p99_ms']:>8} {s['error_rate'] * 100:>6.2f} {s['lock_error_rate'] * 100:>6.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# N single-drink inserts vs one batched insert, under concurrent writers.
+#
+# Each writer process places --groups group orders of --size drinks, either as
+# `size` calls to db.insert_order (one transaction each) or one call to
+# db.insert_orders (one transaction, one executemany). Writers are separate
+# processes so they contend for the SQLite write lock like the Flask and
+# Streamlit processes do.
+#
+#   python benchmarks/batch_inserts.py --writers 1,4,8 --size 6 [--json out.json]
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_group(size):
+    return [
+        {
+            "customer_name": f"Family member {n}",
+            "drink_type": "Latte",
+            "milk_type": "Almond",
+            "flavors": "Vanilla",
+            "drizzle_type": "None",
+            "pickup_time": "ASAP",
+        }
+        for n in range(size)
+    ]
+
+
+def writer(args):
+    path, mode, groups, size, start_at = args
+    import db
+
+    # Never reuse connections inherited across fork()
+    db.DATABASE = path
+    db.reset_shards(close=False)
+
+    group = make_group(size)
+    lock_errors = 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    started = time.perf_counter()
+    for _ in range(groups):
+        try:
+            if mode == "batch":
+                db.insert_orders(group)
+            else:
+                for line in group:
+                    db.insert_order(**line)
+        except sqlite3.OperationalError:
+            lock_errors += 1
+    return time.perf_counter() - started, lock_errors
+
+
+def run(mode, writers, groups, size):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    import db
+    db.DATABASE = path
+    db.reset_shards()
+    db.migrate()
+    db.get_pool().close()
+
+    start_at = time.time() + 0.5
+    with multiprocessing.Pool(writers) as pool:
+        results = pool.map(writer, [(path, mode, groups, size, start_at)] * writers)
+    wall = max(elapsed for elapsed, _ in results)
+    orders = writers * groups * size
+    return {
+        "mode": mode,
+        "writers": writers,
+        "group_size": size,
+        "orders": orders,
+        "wall_s": round(wall, 3),
+        "orders_per_s": round(orders / wall, 1),
+        "lock_errors": sum(errors for _, errors in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs batched order inserts")
+    parser.add_argument("--writers", default="1,4,8")
+    parser.add_argument("--groups", type=int, default=100)
+    parser.add_argument("--size", type=int, default=6)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':>7} {'writers':>8} {'orders':>7} {'wall s':>8} {'orders/s':>9} {'lock errs':>10}")
+    for writers in (int(n) for n in args.writers.split(",")):
+        for mode in ("single", "batch"):
+            result = run(mode, writers, args.groups, args.size)
+            results.append(result)
+            print(f"{mode:>7} {writers:>8} {result['orders']:>7} {result['wall_s']:>8} "
+                  f"{result['orders_per_s']:>9} {result['lock_errors']:>10}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Cost of the idempotency check on order submission.
+#
+# Times idempotency.submit_order_once on a temp database for:
+#   no key         plain insert, the old submit_order path
+#   fresh key      first submission with a key (index check + insert + cache put)
+#   retry via db   duplicate whose key is not cached (e.g. after a restart):
+#                  one write transaction that finds the existing row
+#   retry cached   duplicate answered by the recent-key cache, no SQLite at all
+#
+#   python benchmarks/idempotency_keys.py [--orders 2000] [--json out.json]
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["COFFEE_DATABASE"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import db  # noqa: E402
+from idempotency import recent_keys, submit_order_once  # noqa: E402
+
+
+def timed(calls):
+    samples = []
+    for call in calls:
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    ordered = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_us": round(statistics.fmean(samples), 2),
+        "p50_us": round(ordered[len(ordered) // 2], 2),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+    }
+
+
+def submit(key):
+    return lambda: submit_order_once(key, "Guest", "Latte", "Almond", "Vanilla", "None", "ASAP")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Idempotency check cost per submission")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    db.migrate()
+    keys = [uuid4().hex for _ in range(args.orders)]
+
+    results = {"benchmark": "idempotency_keys", "orders": args.orders}
+    results["no key"] = timed(submit(None) for _ in range(args.orders))
+    results["fresh key"] = timed(submit(key) for key in keys)
+    results["retry cached"] = timed(submit(key) for key in keys)
+
+    def uncached(key):
+        recent_keys.clear()
+        return submit(key)()
+    results["retry via db"] = timed((lambda key=key: uncached(key)) for key in keys)
+
+    with db.connection() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+    results["rows_written"] = rows
+
+    print(f"{'path':<14} {'calls':>7} {'mean us':>9} {'p50 us':>9} {'p99 us':>9}")
+    for path in ("no key", "fresh key", "retry via db", "retry cached"):
+        s = results[path]
+        print(f"{path:<14} {s['calls']:>7} {s['mean_us']:>9} {s['p50_us']:>9} {s['p99_us']:>9}")
+    print(f"\nrows written: {rows} (expected {2 * args.orders}: retries never insert)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Cost of the order journal on the write path.
+#
+# Places --orders single-drink orders through db.insert_order (what
+# POST /order and the Streamlit form end up calling) with the journal off,
+# on with fsync left to the OS, and on with an fsync per batch (the default).
+# --rate paces the orders like a rush (0 = back to back, which is far above
+# any real service and makes each journal batch as large as it gets).
+#
+#   python benchmarks/journal_overhead.py [--orders 2000] [--rate 200] [--json out.json]
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import journal  # noqa: E402
+
+MODES = [("off", None), ("fsync off", "off"), ("fsync batch", "batch")]
+
+
+def run(fsync, orders, rate):
+    db.DATABASE = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.reset_shards()
+    db.migrate()
+    # One recorder per run; the listener list is reset so earlier runs' recorders go quiet
+    db._mutation_listeners.clear()
+    recorder = None
+    if fsync is not None:
+        recorder = journal.Journal(fsync=fsync)
+        recorder.start()
+
+    samples = []
+    next_at = time.perf_counter()
+    for n in range(orders):
+        started = time.perf_counter()
+        db.insert_order(f"Guest {n}", "Latte", "Almond", "Vanilla", "None", "ASAP")
+        samples.append((time.perf_counter() - started) * 1000)
+        if rate:
+            next_at += 1 / rate
+            time.sleep(max(0, next_at - time.perf_counter()))
+    if recorder is not None:
+        recorder.flush()
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 4),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99) - 1], 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "journal": recorder.stats() if recorder else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order insert latency with and without the journal")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=200, help="orders per second; 0 = back to back")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {"benchmark": "journal_overhead", "orders": args.orders, "rate": args.rate, "modes": {}}
+    print(f"{'journal':<12} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'batches':>8} {'fsyncs':>7}")
+    for name, fsync in MODES:
+        r = results["modes"][name] = run(fsync, args.orders, args.rate)
+        stats = r["journal"] or {}
+        print(f"{name:<12} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['mean_ms']:>8} "
+              f"{stats.get('batches', '-'):>8} {stats.get('fsyncs', '-'):>7}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Memory per active order and read latency: live store vs the SQLite path.
+#
+# "sqlite + dict" is what the views did before: fetch the active orders and
+# convert every sqlite3.Row to a dict. "live store" is live_orders.py: __slots__
+# records with interned menu strings, synced from the change feed. Reads are
+# warm (no writes in between), which is what display refreshes and /orders
+# polls pay between orders.
+#
+#   python benchmarks/live_orders.py --orders 100,1000,5000 [--json out.json]
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import live_orders as live  # noqa: E402
+
+DRINKS = ["Latte", "Macchiato", "Cold Brew", "Americano"]
+MILKS = ["1%", "Almond", "Fairlife", "None"]
+FLAVORS = ["Vanilla", "Hazelnut", "Mocha", "None"]
+STATUSES = ["pending", "in_progress", "ready"]
+READS = 200
+
+
+def reset(path):
+    db.DATABASE = path
+    db.reset_shards()
+    db.migrate()
+
+
+def seed(count):
+    rng = random.Random(count)
+    db.insert_orders([
+        {
+            "customer_name": f"Guest {n}",
+            "drink_type": rng.choice(DRINKS),
+            "milk_type": rng.choice(MILKS),
+            "flavors": rng.choice(FLAVORS),
+            "drizzle_type": "None",
+            "pickup_time": "ASAP",
+        }
+        for n in range(count)
+    ])
+    with db.transaction() as conn:
+        conn.execute(
+            "UPDATE orders SET status = CASE id % 3 WHEN 0 THEN 'pending' "
+            "WHEN 1 THEN 'in_progress' ELSE 'ready' END"
+        )
+
+
+def measure_memory(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return held, after - before
+
+
+def time_reads(read):
+    samples = []
+    for _ in range(READS):
+        start = time.perf_counter()
+        read()
+        samples.append((time.perf_counter() - start) * 1000)
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1], 4),
+    }
+
+
+def sqlite_dicts():
+    return [dict(row) for row in db.fetch_orders(db.ACTIVE_STATUSES)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live order store vs SQLite reads")
+    parser.add_argument("--orders", default="100,1000,5000")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    args = parser.parse_args()
+
+    results = {"benchmark": "live_orders", "reads": READS, "sizes": {}}
+    for count in [int(n) for n in args.orders.split(",")]:
+        reset(os.path.join(tempfile.mkdtemp(), "bench.db"))
+        seed(count)
+
+        dicts, dict_bytes = measure_memory(sqlite_dicts)
+        store = live.LiveOrderStore()
+        _, store_bytes = measure_memory(lambda: (store.sync(force=True), store.active()))
+        assert [o.as_dict() for o in store.active()] == dicts
+
+        results["sizes"][count] = {
+            "sqlite + dict": {"bytes_per_order": round(dict_bytes / count), **time_reads(sqlite_dicts)},
+            "live store": {"bytes_per_order": round(store_bytes / count), **time_reads(store.active)},
+        }
+        del dicts, store
+
+    print(f"{'orders':>7} {'path':<14} {'bytes/order':>12} {'p50 ms':>9} {'p95 ms':>9}")
+    for count, paths in results["sizes"].items():
+        for path, r in paths.items():
+            print(f"{count:>7} {path:<14} {r['bytes_per_order']:>12} {r['p50_ms']:>9} {r['p95_ms']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
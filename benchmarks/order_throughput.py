@@ -0,0 +1,342 @@
+# Order-placement throughput benchmark and Sunday-traffic load generator.
+#
+# Starts app.py in its own process on a temp database and replays a service:
+# a pre-service trickle, the burst when service lets out, and a cool-down where
+# baristas work the queue down. Clients hit POST /order, GET /orders and
+# PATCH /order/<id>. A separate writer process meanwhile inserts through
+# db.insert_order with pickup_time="ASAP" (the Streamlit submit_order path),
+# so the API contends for the write lock the way it does in production.
+#
+# Reports p50/p95/p99 latency, throughput and error/lock-error rates per
+# endpoint, and with --json writes machine-readable results for comparing
+# releases.
+#
+# With --journal, the traffic is a recorded service instead (an order journal,
+# see journal.py): every create and status change is sent to the API on the
+# recorded schedule, sped up by --speed (0 = as fast as the clients can go).
+#
+#   python benchmarks/order_throughput.py [--scale 1.0] [--json results.json]
+#   python benchmarks/order_throughput.py --journal database.journal.jsonl --speed 10
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DRINKS = [("Latte", "Almond"), ("Latte", "1%"), ("Macchiato", "Fairlife"),
+          ("Cold Brew", "None"), ("Americano", "None")]
+
+# (name, seconds, concurrent clients, {operation: weight})
+PHASES = [
+    ("pre-service", 5, 4, {"create": 6, "list": 3, "update": 1}),
+    ("service-end burst", 10, 32, {"create": 7, "list": 2, "update": 1}),
+    ("cool-down", 5, 8, {"create": 2, "list": 4, "update": 4}),
+]
+STREAMLIT_SUBMITS_PER_SECOND = 20
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(path, port):
+    os.environ["COFFEE_DATABASE"] = path
+    import logging
+    from werkzeug.serving import make_server
+
+    import app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", port, app.app, threaded=True).serve_forever()
+
+
+def streamlit_writer(path, stop_at, results):
+    # Same call submit_order() makes in streamlit_app.py
+    os.environ["COFFEE_DATABASE"] = path
+    import db
+
+    latencies, errors, lock_errors = [], 0, 0
+    interval = 1 / STREAMLIT_SUBMITS_PER_SECOND
+    while time.time() < stop_at:
+        drink, milk = random.choice(DRINKS)
+        start = time.perf_counter()
+        try:
+            db.insert_order("Streamlit guest", drink, milk, "Vanilla", "None", pickup_time="ASAP")
+        except Exception as error:
+            errors += 1
+            lock_errors += "locked" in str(error)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    results.put({"latencies": latencies, "errors": errors, "lock_errors": lock_errors})
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock_errors = defaultdict(int)
+        self.order_ids = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, ms, status, body):
+        with self._lock:
+            self.latencies[endpoint].append(ms)
+            if status == 503:
+                self.lock_errors[endpoint] += 1
+            if status >= 400:
+                self.errors[endpoint] += 1
+            elif endpoint == "POST /order":
+                self.order_ids.append(json.loads(body)["order_id"])
+
+
+def request(port, recorder, method, path, endpoint, payload=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    body = json.dumps(payload) if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body else {}
+    start = time.perf_counter()
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        data = response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        data, status = b"", 599
+    finally:
+        conn.close()
+    recorder.record(endpoint, (time.perf_counter() - start) * 1000, status, data)
+    return status, data
+
+
+def client(port, recorder, mix, stop_at, seed):
+    rng = random.Random(seed)
+    operations = list(mix)
+    weights = [mix[op] for op in operations]
+    while time.time() < stop_at:
+        operation = rng.choices(operations, weights)[0]
+        if operation == "create":
+            drink, milk = rng.choice(DRINKS)
+            request(port, recorder, "POST", "/order", "POST /order", {
+                "customer_name": f"Guest {rng.randrange(10000)}",
+                "drink_type": drink,
+                "milk_type": milk,
+                "pickup_time": "ASAP",
+            })
+        elif operation == "list":
+            request(port, recorder, "GET", "/orders?status=active", "GET /orders")
+        elif recorder.order_ids:
+            order_id = rng.choice(recorder.order_ids[-200:])
+            status = rng.choice(["in_progress", "ready", "complete"])
+            request(port, recorder, "PATCH", f"/order/{order_id}", "PATCH /order/<id>",
+                    {"status": status})
+
+
+# --- Recorded traffic: replay an order journal against the API ---
+JOURNAL_CLIENTS = 64
+
+
+def replay_journal(port, recorder, path, speed):
+    import journal
+
+    # Recorded order id -> id the API assigned; status changes wait for it
+    ids = {}
+    created = defaultdict(threading.Event)
+
+    def new_id(old_id):
+        created[old_id].wait(10)
+        return ids.get(old_id)
+
+    def send(entry):
+        op = entry["op"]
+        if op == "create":
+            payload = {field: entry.get(field) for field in
+                       ("customer_name", "drink_type", "milk_type", "flavors", "drizzle_type", "pickup_time")}
+            if entry.get("idempotency_key"):
+                payload["idempotency_key"] = entry["idempotency_key"]
+            status, data = request(port, recorder, "POST", "/order", "POST /order", payload)
+            if status < 400:
+                ids[entry["id"]] = json.loads(data)["order_id"]
+            created[entry["id"]].set()
+        elif op == "create_many":
+            orders = [{k: v for k, v in order.items() if k != "timestamp"} for order in entry["orders"]]
+            status, data = request(port, recorder, "POST", "/orders/batch", "POST /orders/batch",
+                                   {"orders": orders})
+            if status < 400:
+                for result in json.loads(data)["results"]:
+                    if "order_id" in result:
+                        ids[entry["ids"][result["index"]]] = result["order_id"]
+            for old_id in entry["ids"]:
+                created[old_id].set()
+        elif op == "status":
+            order_id = new_id(entry["id"])
+            if order_id is not None:
+                request(port, recorder, "PATCH", f"/order/{order_id}", "PATCH /order/<id>",
+                        {"status": entry["status"]})
+        elif op == "statuses":
+            updates = [
+                {"id": order_id, "status": update["status"]}
+                for update in entry["updates"]
+                if (order_id := new_id(update["id"])) is not None
+            ]
+            if updates:
+                request(port, recorder, "PATCH", "/orders", "PATCH /orders", {"updates": updates})
+
+    started = time.time()
+    count = 0
+    with ThreadPoolExecutor(max_workers=JOURNAL_CLIENTS) as pool:
+        for entry in journal.paced(journal.read_entries(path), speed):
+            pool.submit(send, entry)
+            count += 1
+    seconds = time.time() - started
+    return {"phase": f"journal x{speed:g}" if speed else "journal (max)", "clients": JOURNAL_CLIENTS,
+            "seconds": round(seconds, 2), "requests": count, "throughput_rps": round(count / seconds, 1)}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, errors, lock_errors, seconds):
+    count = len(latencies)
+    if not count:
+        return {"requests": 0}
+    return {
+        "requests": count,
+        "throughput_rps": round(count / seconds, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "error_rate": round(errors / count, 4),
+        "lock_error_rate": round(lock_errors / count, 4),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sunday-traffic order API load test")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply phase durations and client counts")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    parser.add_argument("--journal", help="replay this order journal instead of the synthetic phases")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="journal replay speed: 1 = recorded pace, 10 = ten times faster, 0 = no waiting")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(path, port), daemon=True)
+    server.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    recorder = Recorder()
+    if args.journal:
+        started = time.time()
+        phases = [replay_journal(port, recorder, args.journal, args.speed)]
+        elapsed = time.time() - started
+        server.terminate()
+        report(args, recorder, phases, elapsed)
+        return
+
+    total_seconds = sum(seconds for _, seconds, _, _ in PHASES) * args.scale
+    writer_results = multiprocessing.Queue()
+    writer = multiprocessing.Process(
+        target=streamlit_writer, args=(path, time.time() + total_seconds, writer_results)
+    )
+    writer.start()
+
+    phases = []
+    started = time.time()
+    for name, seconds, clients, mix in PHASES:
+        seconds *= args.scale
+        clients = max(1, round(clients * args.scale))
+        stop_at = time.time() + seconds
+        before = {endpoint: len(values) for endpoint, values in recorder.latencies.items()}
+        threads = [
+            threading.Thread(target=client, args=(port, recorder, mix, stop_at, n))
+            for n in range(clients)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        done = sum(len(v) for v in recorder.latencies.values()) - sum(before.values())
+        phases.append({"phase": name, "clients": clients, "seconds": seconds,
+                       "requests": done, "throughput_rps": round(done / seconds, 1)})
+    elapsed = time.time() - started
+
+    writer_result = writer_results.get()
+    writer.join()
+    server.terminate()
+    report(args, recorder, phases, elapsed, writer_result)
+
+
+def report(args, recorder, phases, elapsed, writer_result=None):
+    endpoints = {
+        endpoint: summarize(values, recorder.errors[endpoint],
+                            recorder.lock_errors[endpoint], elapsed)
+        for endpoint, values in sorted(recorder.latencies.items())
+    }
+    if writer_result is not None:
+        endpoints["streamlit submit_order"] = summarize(
+            writer_result["latencies"], writer_result["errors"],
+            writer_result["lock_errors"], elapsed,
+        )
+    results = {
+        "benchmark": "order_throughput",
+        "git_revision": git_revision(),
+        "run_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "scale": args.scale,
+        "journal": args.journal,
+        "speed": args.speed if args.journal else None,
+        "phases": phases,
+        "endpoints": endpoints,
+    }
+
+    print(f"{'phase':<20} {'clients':>8} {'requests':>9} {'req/s':>8}")
+    for phase in phases:
+        print(f"{phase['phase']:<20} {phase['clients']:>8} {phase['requests']:>9} {phase['throughput_rps']:>8}")
+    print()
+    print(f"{'endpoint':<24} {'reqs':>6} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'err%':>6} {'lock%':>6}")
+    for endpoint, s in endpoints.items():
+        if not s["requests"]:
+            continue
+        print(f"{endpoint:<24} {s['requests']:>6} {s['throughput_rps']:>7} {s['p50_ms']:>7} "
+              f"{s['p95_ms']:>7} {s['p99_ms']:>7} {s['error_rate'] * 100:>6.2f} {s['lock_error_rate'] * 100:>6.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# Per-rerun cost of building the Customer Display and Manage Orders views.
+#
+# "legacy" is the old per-row loop: build the Chicago tz object, then
+# strptime + localize + astimezone + strftime for every order, and 7 st.write
+# calls per management card. "pipeline" is render.py: cached tz, conversions
+# memoized per minute, cards memoized on content, one element per card.
+# Rerun timings are warm (second and later reruns in the same process), which
+# is what every Streamlit interaction pays. "pipeline" is a rerun right after
+# an order changed (the live store hands over a new list, so the display is
+# rebuilt): still linear in the number of orders, at a much smaller constant.
+# "unchanged" is the display on a rerun where no order changed, which reuses
+# the last columns and does not depend on the board size.
+#
+#   python benchmarks/render_pipeline.py --orders 10,100,1000,5000 [--json out.json]
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import render  # noqa: E402
+
+DRINKS = ["Latte", "Macchiato", "Cold Brew", "Americano"]
+STATUSES = ["pending", "in_progress", "ready"]
+
+
+def make_orders(count):
+    # A Sunday rush: every order lands within one 90-minute window
+    start = datetime(2026, 10, 18, 14, 0, 0)
+    rng = random.Random(count)
+    return [
+        {
+            "id": n,
+            "customer_name": f"Guest {n}",
+            "drink_type": rng.choice(DRINKS),
+            "milk_type": "Almond",
+            "flavors": "Vanilla",
+            "drizzle_type": "None",
+            "status": rng.choice(STATUSES),
+            "timestamp": (start + timedelta(seconds=rng.randrange(90 * 60))).strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        for n in range(count)
+    ]
+
+
+def legacy_rerun(orders):
+    central = pytz.timezone("America/Chicago")
+    columns = {status: [] for status in STATUSES}
+    elements = 0
+    for row in orders:
+        utc_dt = pytz.utc.localize(datetime.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S"))
+        formatted_time = utc_dt.astimezone(central).strftime("%I:%M %p")
+        columns[row["status"]].append(
+            f"**{row['customer_name']}**\n\n☕ {row['drink_type']}\n🕒 {formatted_time}"
+        )
+        elements += 1
+    for row in orders:
+        utc_dt = pytz.utc.localize(datetime.strptime(row["timestamp"], "%Y-%m-%d %H:%M:%S"))
+        formatted_time = utc_dt.astimezone(central).strftime("%Y-%m-%d %I:%M %p %Z")
+        lines = [
+            f"**Order ID:** {row['id']}",
+            f"👤 **Name:** {row['customer_name']}",
+            f"☕ **Drink:** {row['drink_type']} with {row['milk_type']} milk",
+            f"🍯 **Flavors:** {row['flavors']}",
+            f"🍫 **Drizzle:** {row['drizzle_type']}",
+            f"📅 **Placed:** {formatted_time}",
+            f"🔖 **Status:** {row['status']}",
+        ]
+        elements += len(lines)
+    return elements
+
+
+def pipeline_rerun(orders):
+    # A new list, as live_orders.active() returns after any change
+    columns = render.build_display_columns(list(orders))
+    cards = render.build_management_cards(orders)
+    return sum(len(c) for c in columns.values()) + len(cards)
+
+
+def unchanged_rerun(orders):
+    columns = render.build_display_columns(orders)
+    return sum(len(c) for c in columns.values())
+
+
+def per_rerun_ms(fn, orders, repeats):
+    fn(orders)  # warm-up rerun
+    start = time.perf_counter()
+    for _ in range(repeats):
+        elements = fn(orders)
+    return (time.perf_counter() - start) * 1000 / repeats, elements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Display/management render cost per rerun")
+    parser.add_argument("--orders", default="10,100,1000,5000")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'orders':>7} {'legacy ms':>10} {'pipeline ms':>12} {'speedup':>8} {'unchanged ms':>13} "
+          f"{'legacy elems':>13} {'pipeline elems':>15}")
+    for count in (int(n) for n in args.orders.split(",")):
+        orders = make_orders(count)
+        legacy_ms, legacy_elements = per_rerun_ms(legacy_rerun, orders, args.repeats)
+        pipeline_ms, pipeline_elements = per_rerun_ms(pipeline_rerun, orders, args.repeats)
+        unchanged_ms, _ = per_rerun_ms(unchanged_rerun, orders, args.repeats)
+        result = {
+            "orders": count,
+            "legacy_ms": round(legacy_ms, 3),
+            "pipeline_ms": round(pipeline_ms, 3),
+            "speedup": round(legacy_ms / pipeline_ms, 1),
+            "display_unchanged_ms": round(unchanged_ms, 4),
+            "legacy_elements": legacy_elements,
+            "pipeline_elements": pipeline_elements,
+        }
+        results.append(result)
+        print(f"{count:>7} {result['legacy_ms']:>10} {result['pipeline_ms']:>12} "
+              f"{result['speedup']:>8} {result['display_unchanged_ms']:>13} "
+              f"{legacy_elements:>13} {pipeline_elements:>15}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Order write latency while display screens and report readers poll, with
+# the readers on the primary file vs on the read replica.
+#
+# One writer places single-drink orders at a steady rush pace and records how
+# long each insert takes. --readers separate processes (TV displays, /orders
+# pollers, report pages) loop over a history page, the daily report and a
+# COUNT(*), either against database.db or through db.use_replica(). The
+# writer's process runs the replica refresher, as the Flask/Streamlit
+# processes do. The history is seeded large enough that reader snapshots are
+# long-lived, which is what holds back WAL checkpoints on the primary.
+#
+#   python benchmarks/replica_reads.py --readers 4 --seconds 10 [--json out.json]
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+
+ORDER = {"customer_name": "Rush guest", "drink_type": "Latte", "milk_type": "Almond",
+         "flavors": "Vanilla", "drizzle_type": "None", "pickup_time": "ASAP"}
+
+
+def reader(args):
+    path, use_replica, stop_at = args
+    import reports
+
+    db.DATABASE = path
+    db.reset_shards(close=False)
+    if use_replica:
+        # This process doesn't refresh; it trusts the writer's refresher
+        db.REPLICA_MAX_STALENESS = float("inf")
+        db.get_shard().replica_current_at = time.monotonic()
+    reads = 0
+    while time.time() < stop_at:
+        if use_replica:
+            with db.use_replica():
+                read_once(reports)
+        else:
+            read_once(reports)
+        reads += 1
+    return reads
+
+
+def read_once(reports):
+    db.fetch_orders(limit=200)
+    reports.daily_orders()
+    db.count_orders()
+
+
+def run(mode, readers, seconds, seed_orders, rate):
+    import replica
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.DATABASE = path
+    db.reset_shards()
+    db.migrate()
+    db.insert_orders([ORDER] * seed_orders)
+    if mode == "replica":
+        replica.refresh(force=True)
+        replica.start_background()
+    db.get_pool().close()
+
+    stop_at = time.time() + seconds + 0.5
+    latencies = []
+    with multiprocessing.Pool(readers) as pool:
+        pending = pool.map_async(reader, [(path, mode == "replica", stop_at)] * readers)
+        time.sleep(0.5)
+        next_at = time.perf_counter()
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            db.insert_order(**ORDER)
+            latencies.append((time.perf_counter() - started) * 1000)
+            next_at += 1 / rate
+            time.sleep(max(0, next_at - time.perf_counter()))
+        reads = sum(pending.get())
+
+    ordered = sorted(latencies)
+    return {
+        "readers_on": mode,
+        "readers": readers,
+        "writes": len(latencies),
+        "write_p50_ms": round(statistics.median(latencies), 3),
+        "write_p99_ms": round(ordered[int(len(ordered) * 0.99) - 1], 3),
+        "write_max_ms": round(ordered[-1], 3),
+        "reads_per_s": round(reads / seconds, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write latency with readers on primary vs replica")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=50000, help="orders already in the history")
+    parser.add_argument("--rate", type=float, default=50, help="orders per second during the rush")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'readers on':>10} {'writes':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'reads/s':>9}")
+    # The replica run goes second: its refresher thread stays up for the process
+    for mode in ("primary", "replica"):
+        r = run(mode, args.readers, args.seconds, args.seed, args.rate)
+        results.append(r)
+        print(f"{mode:>10} {r['writes']:>7} {r['write_p50_ms']:>8} {r['write_p99_ms']:>8} "
+              f"{r['write_max_ms']:>8} {r['reads_per_s']:>9}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
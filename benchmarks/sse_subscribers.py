@@ -0,0 +1,128 @@
+# Load test for the live order board (GET /orders/stream).
+#
+# Opens N concurrent SSE subscribers against one in-process Flask server on a
+# temp database, places an order, and measures how long the change takes to
+# reach every subscriber and how many DB reads the fan-out cost.
+#
+#   python benchmarks/sse_subscribers.py --steps 50,100,250,500 [--json out.json]
+import argparse
+import json
+import logging
+import os
+import resource
+import selectors
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["COFFEE_DATABASE"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import app  # noqa: E402
+from events import broadcaster  # noqa: E402
+
+
+def start_server():
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def open_subscribers(port, count):
+    selector = selectors.DefaultSelector()
+    request = f"GET /orders/stream HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode()
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(request)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, data=bytearray())
+    return selector
+
+
+def wait_for(selector, marker, count, timeout=30.0):
+    # Returns the per-socket arrival time of `marker` in the stream
+    arrived = {}
+    deadline = time.perf_counter() + timeout
+    while len(arrived) < count and time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=0.5):
+            chunk = key.fileobj.recv(65536)
+            key.data.extend(chunk)
+            if key.fileobj not in arrived and marker in key.data:
+                arrived[key.fileobj] = time.perf_counter()
+                del key.data[:]
+    return arrived
+
+
+def close_subscribers(selector):
+    for key in list(selector.get_map().values()):
+        selector.unregister(key.fileobj)
+        key.fileobj.close()
+    selector.close()
+
+
+def run_step(port, count, client):
+    connect_start = time.perf_counter()
+    selector = open_subscribers(port, count)
+    snapshots = wait_for(selector, b"event: snapshot", count)
+    connect_time = time.perf_counter() - connect_start
+
+    reads_before = broadcaster.reads
+    sent = time.perf_counter()
+    client.post("/order", json={"customer_name": "Load", "drink_type": "Latte"})
+    arrived = wait_for(selector, b"event: orders", count)
+    latencies = sorted((t - sent) * 1000 for t in arrived.values())
+
+    close_subscribers(selector)
+    # Server threads notice the hang-up on their next keepalive write
+    deadline = time.time() + app.KEEPALIVE_SECONDS * 3
+    while broadcaster.subscriber_count() and time.time() < deadline:
+        time.sleep(0.1)
+
+    return {
+        "subscribers": count,
+        "connected": len(snapshots),
+        "delivered": len(arrived),
+        "connect_s": round(connect_time, 3),
+        "fanout_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "fanout_max_ms": round(latencies[-1], 2) if latencies else None,
+        "db_reads": broadcaster.reads - reads_before,
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /orders/stream subscriber load test")
+    parser.add_argument("--steps", default="50,100,250,500")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app.KEEPALIVE_SECONDS = 1
+    server = start_server()
+    client = app.app.test_client()
+
+    results = []
+    print(f"{'subs':>6} {'conn':>6} {'dlvd':>6} {'connect s':>10} {'p50 ms':>8} {'max ms':>8} {'reads':>6} {'rss MB':>7}")
+    for count in (int(n) for n in args.steps.split(",")):
+        result = run_step(server.port, count, client)
+        results.append(result)
+        print(f"{result['subscribers']:>6} {result['connected']:>6} {result['delivered']:>6} "
+              f"{result['connect_s']:>10} {result['fanout_p50_ms']!s:>8} {result['fanout_max_ms']!s:>8} "
+              f"{result['db_reads']:>6} {result['max_rss_mb']:>7}")
+        if result["delivered"] < count:
+            break
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Cold-start and per-rerun cost of schema setup, before and after the shared
+# migrator.
+#
+# "legacy" replays what streamlit_app.py used to run on every rerun (the old
+# init_db + init_menu_options: CREATE TABLE IF NOT EXISTS, PRAGMA table_info
+# probes, the COALESCE backfill, COUNT(*) and one commit per step, each on a
+# fresh connection). "migrator" is db.migrate(): a full upgrade on a new
+# database, one PRAGMA user_version read on the first call in a process, and
+# a flag check on every rerun after that.
+#
+#   python benchmarks/startup_migrations.py [--reruns 200] [--json out.json]
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ["COFFEE_DATABASE"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+import db  # noqa: E402
+
+
+def legacy_init(path):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            drink_type TEXT NOT NULL,
+            milk_type TEXT,
+            flavors TEXT,
+            pickup_time TEXT,
+            status TEXT DEFAULT 'pending',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("PRAGMA table_info(orders)")
+    if "drizzle_type" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE orders ADD COLUMN drizzle_type TEXT")
+    conn.commit()
+    conn.close()
+
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS menu_options (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            label TEXT NOT NULL,
+            active INTEGER DEFAULT 1,
+            sort_order INTEGER DEFAULT 0,
+            UNIQUE(category, label)
+        )
+    ''')
+    conn.commit()
+    cursor.execute("PRAGMA table_info(menu_options)")
+    if "sort_order" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE menu_options ADD COLUMN sort_order INTEGER DEFAULT 0")
+        conn.commit()
+    cursor.execute("PRAGMA table_info(menu_options)")
+    cols = [row[1] for row in cursor.fetchall()]
+    if "espresso_enabled" not in cols:
+        cursor.execute("ALTER TABLE menu_options ADD COLUMN espresso_enabled INTEGER DEFAULT 1")
+        conn.commit()
+    if "cold_brew_enabled" not in cols:
+        cursor.execute("ALTER TABLE menu_options ADD COLUMN cold_brew_enabled INTEGER DEFAULT 1")
+        conn.commit()
+    cursor.execute("""
+        UPDATE menu_options
+        SET espresso_enabled = COALESCE(espresso_enabled, 1),
+            cold_brew_enabled = COALESCE(cold_brew_enabled, 1)
+        WHERE category = 'flavor'
+    """)
+    conn.commit()
+    cursor.execute("SELECT COUNT(*) FROM menu_options")
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            "INSERT OR IGNORE INTO menu_options (category, label, sort_order) VALUES (?, ?, ?)",
+            db.DEFAULT_MENU_OPTIONS,
+        )
+        conn.commit()
+    conn.close()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema setup cold-start/rerun timings")
+    parser.add_argument("--reruns", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    legacy_path = os.path.join(os.path.dirname(db.DATABASE), "legacy.db")
+    legacy_cold = timed(legacy_init, legacy_path)
+    legacy_rerun = sum(timed(legacy_init, legacy_path) for _ in range(args.reruns)) / args.reruns
+
+    migrator_cold = timed(db.migrate)
+    # A new process against an up-to-date database: one pragma read
+    first_calls = []
+    for _ in range(args.reruns):
+        db.get_shard().migrated = False
+        first_calls.append(timed(db.migrate))
+    migrator_first = sum(first_calls) / args.reruns
+    migrator_rerun = sum(timed(db.migrate) for _ in range(args.reruns)) / args.reruns
+
+    results = {
+        "legacy_cold_ms": round(legacy_cold, 3),
+        "legacy_rerun_ms": round(legacy_rerun, 3),
+        "migrator_cold_ms": round(migrator_cold, 3),
+        "migrator_process_start_ms": round(migrator_first, 4),
+        "migrator_rerun_ms": round(migrator_rerun, 5),
+    }
+    for name, value in results.items():
+        print(f"{name:>28}: {value}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
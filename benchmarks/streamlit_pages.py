@@ -0,0 +1,139 @@
+# Startup and rerun cost of each Streamlit page.
+#
+# Every page runs in a fresh process through Streamlit's AppTest harness, so
+# "first run" includes importing whatever that page pulls in. "import ms" is
+# the time spent in top-level imports of modules that were not loaded yet
+# (nested imports are counted inside their parent). Reruns are warm: same
+# process, same session, which is what every click pays. Order Management is
+# timed logged in, on its default (Manage Orders) view.
+#
+#   python benchmarks/streamlit_pages.py [--reruns 20] [--orders 200] [--json out.json]
+import argparse
+import builtins
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGES = ["Place Order", "Customer Display", "New Here?", "🔒 Order Management"]
+HEAVY_MODULES = ["pandas", "pyarrow", "export", "reports", "usage"]
+
+
+class ImportTimer:
+    # Wraps __import__ and times only the outermost import statement
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+        self._import = builtins.__import__
+
+    def __call__(self, name, *args, **kwargs):
+        if self.depth or name in sys.modules:
+            self.depth += 1
+            try:
+                return self._import(name, *args, **kwargs)
+            finally:
+                self.depth -= 1
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            return self._import(name, *args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.depth -= 1
+
+    def __enter__(self):
+        builtins.__import__ = self
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._import
+
+
+def seed(count):
+    import db
+
+    db.migrate()
+    db.insert_orders([
+        {"customer_name": f"Guest {n}", "drink_type": "Latte", "milk_type": "Almond"}
+        for n in range(count)
+    ])
+
+
+def child(page, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    # Load Streamlit's own runtime first so it isn't billed to the page
+    warmup = os.path.join(tempfile.mkdtemp(), "warmup.py")
+    with open(warmup, "w") as f:
+        f.write("import streamlit as st\nst.write('warm')\n")
+    AppTest.from_file(warmup).run()
+
+    at = AppTest.from_file(os.path.join(ROOT, "streamlit_app.py"), default_timeout=60)
+    at.session_state["nav"] = page
+    at.session_state["volunteer_authenticated"] = True
+    with ImportTimer() as imports:
+        started = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - started
+    if at.exception:
+        raise SystemExit(f"{page}: {at.exception[0].message}")
+
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - started)
+    return {
+        "first_run_ms": round(first * 1000, 1),
+        "import_ms": round(imports.seconds * 1000, 1),
+        "rerun_p50_ms": round(statistics.median(samples) * 1000, 2),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit per-page startup and rerun timings")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.reruns)))
+        return
+
+    env = dict(
+        os.environ,
+        COFFEE_DATABASE=os.path.join(tempfile.mkdtemp(), "bench.db"),
+        COFFEE_ARCHIVE_AFTER_HOURS="0",
+    )
+    os.environ.update(env)
+    seed(args.orders)
+
+    results = {"benchmark": "streamlit_pages", "orders": args.orders, "reruns": args.reruns, "pages": {}}
+    for page in PAGES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", page, "--reruns", str(args.reruns)],
+            env=env, check=True, capture_output=True, text=True, cwd=ROOT,
+        )
+        results["pages"][page] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{'page':<22} {'first run ms':>13} {'import ms':>10} {'rerun p50 ms':>13}  heavy modules loaded")
+    for page, r in results["pages"].items():
+        print(f"{page:<22} {r['first_run_ms']:>13} {r['import_ms']:>10} {r['rerun_p50_ms']:>13}  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1264 @@
+import contextvars
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import metrics
+
+DATABASE = os.environ.get("COFFEE_DATABASE", "database.db")
+
+# --- Connection settings ---
+POOL_SIZE = 8
+READ_POOL_SIZE = 8
+BUSY_TIMEOUT_MS = 5000
+# How long a thread waits for a free pooled connection before giving up
+POOL_TIMEOUT_SECONDS = 5
+STATEMENT_CACHE_SIZE = 128
+
+
+# --- Instrumented connection: per-statement timing, rows returned, commit time ---
+class InstrumentedCursor(sqlite3.Cursor):
+    statement = "unknown"
+
+    def _count(self, rows):
+        metrics.rows_returned.inc(rows, operation=metrics.current_operation(), statement=self.statement)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._count(1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._count(len(rows))
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    def _run(self, method, sql, params):
+        cursor = self.cursor(InstrumentedCursor)
+        cursor.statement = metrics.statement_label(sql)
+        start = time.perf_counter()
+        try:
+            return getattr(cursor, method)(sql, params)
+        finally:
+            metrics.query_seconds.observe(
+                time.perf_counter() - start,
+                operation=metrics.current_operation(), statement=cursor.statement,
+            )
+
+    def execute(self, sql, params=()):
+        return self._run("execute", sql, params)
+
+    def executemany(self, sql, params):
+        return self._run("executemany", sql, params)
+
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            metrics.commit_seconds.observe(time.perf_counter() - start, operation=metrics.current_operation())
+
+
+def _open_connection(path, read_only=False):
+    # isolation_level=None puts sqlite3 in autocommit mode so that writes can
+    # take the write lock up front with BEGIN IMMEDIATE (see transaction()).
+    start = time.perf_counter()
+    conn = sqlite3.connect(
+        f"{Path(path).absolute().as_uri()}?mode=ro" if read_only else path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        factory=InstrumentedConnection,
+        uri=read_only,
+    )
+    conn.row_factory = sqlite3.Row
+    if not read_only:
+        # Persistent in the file; read-only connections just follow it
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA foreign_keys = ON")
+    # SQLite has no per-statement rows-scanned counter; VM steps stand in for it
+    conn.set_progress_handler(metrics.count_vm_steps, metrics.VM_STEP_INTERVAL)
+    metrics.connection_open_seconds.observe(time.perf_counter() - start)
+    return conn
+
+
+# --- Bounded connection pool ---
+class ConnectionPool:
+    def __init__(self, path, max_size=POOL_SIZE, read_only=False, timeout=POOL_TIMEOUT_SECONDS):
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.read_only = read_only
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def _acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.hits += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.max_size
+            if can_create:
+                self._created += 1
+                self.misses += 1
+        if can_create:
+            try:
+                return _open_connection(self.path, self.read_only)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool exhausted: wait for another thread to hand a connection back.
+        # Raised as "busy" so the apps answer 503 + Retry-After instead of hanging.
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"database is busy: no pooled connection free after {self.timeout}s"
+            ) from None
+        finally:
+            with self._lock:
+                self.waits += 1
+                self.wait_time += time.perf_counter() - start
+        return conn
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        # Re-entrant per thread: nested helpers share the caller's connection
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self._created,
+                "max_size": self.max_size,
+                "idle": self._idle.qsize(),
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "wait_time_ms": round(self.wait_time * 1000, 3),
+            }
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+# --- Sites: one SQLite shard (file + pools) per campus ---
+# COFFEE_SITES="main=database.db,north=north.db,south=south.db". The default
+# site always exists and falls back to DATABASE.
+DEFAULT_SITE = os.environ.get("COFFEE_DEFAULT_SITE", "main")
+
+
+def _parse_sites(value):
+    sites = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        site, _, path = entry.partition("=")
+        if not site.strip() or not path.strip():
+            raise ValueError(f"COFFEE_SITES entries look like site=path, got {entry!r}")
+        sites[site.strip()] = path.strip()
+    return sites
+
+
+SITES = _parse_sites(os.environ.get("COFFEE_SITES", ""))
+
+# Display screens and read-only endpoints read a snapshot copy of each shard
+# (see replica.py) while it is at most this many seconds behind; 0 turns the
+# replica off and every read goes to the primary file
+REPLICA_MAX_STALENESS = float(os.environ.get("COFFEE_REPLICA_MAX_STALENESS", "2"))
+
+
+def replica_path(path):
+    # database.db -> database.replica.db, next to the primary
+    root, ext = os.path.splitext(path)
+    return f"{root}.replica{ext or '.db'}"
+
+
+class Shard:
+    def __init__(self, site, path):
+        self.site = site
+        self.path = path
+        self.pool = ConnectionPool(path)
+        self.read_pool = None
+        self.replica_path = replica_path(path)
+        self.replica_pool = None
+        # monotonic time the replica was last known to match the primary
+        self.replica_current_at = None
+        self.migrated = False
+        self.lock = threading.Lock()
+
+    def get_read_pool(self):
+        with self.lock:
+            if self.read_pool is None:
+                self.read_pool = ConnectionPool(self.path, READ_POOL_SIZE, read_only=True)
+        return self.read_pool
+
+    def get_replica_pool(self):
+        with self.lock:
+            if self.replica_pool is None:
+                self.replica_pool = ConnectionPool(self.replica_path, READ_POOL_SIZE, read_only=True)
+        return self.replica_pool
+
+    def replica_age(self):
+        if self.replica_current_at is None:
+            return None
+        return time.monotonic() - self.replica_current_at
+
+    def replica_fresh(self, max_staleness=None):
+        age = self.replica_age()
+        limit = REPLICA_MAX_STALENESS if max_staleness is None else max_staleness
+        return age is not None and age <= limit
+
+    def close(self):
+        self.pool.close()
+        for pool in (self.read_pool, self.replica_pool):
+            if pool is not None:
+                pool.close()
+
+
+_shards = {}
+_shards_lock = threading.Lock()
+_current_site = contextvars.ContextVar("coffee_site", default=DEFAULT_SITE)
+
+
+def sites():
+    return list(dict.fromkeys([DEFAULT_SITE, *SITES]))
+
+
+def site_path(site):
+    if site in SITES:
+        return SITES[site]
+    if site == DEFAULT_SITE:
+        return DATABASE
+    raise KeyError(f"Unknown site: {site}")
+
+
+def register_site(site, path):
+    SITES[site] = path
+
+
+def current_site():
+    return _current_site.get()
+
+
+def set_site(site):
+    # Routes every db call made from this thread/context to the site's shard
+    site_path(site)
+    _current_site.set(site)
+
+
+@contextmanager
+def use_site(site):
+    site_path(site)
+    token = _current_site.set(site)
+    try:
+        yield
+    finally:
+        _current_site.reset(token)
+
+
+def get_shard(site=None):
+    site = site or current_site()
+    shard = _shards.get(site)
+    if shard is None:
+        with _shards_lock:
+            shard = _shards.get(site)
+            if shard is None:
+                shard = _shards[site] = Shard(site, site_path(site))
+    return shard
+
+
+def reset_shards(close=True):
+    # Forget every shard, e.g. after pointing DATABASE somewhere else or in a
+    # forked child (close=False: never touch connections inherited across fork).
+    # Per-site caches go too, so nothing keeps serving the old shard's data.
+    with _shards_lock:
+        if close:
+            for shard in _shards.values():
+                shard.close()
+        _shards.clear()
+    for per_site in _per_site_caches:
+        per_site.reset()
+
+
+def get_pool():
+    return get_shard().pool
+
+
+# --- Read-only pool for reader threads (see async_app.py) ---
+_thread = threading.local()
+
+
+def get_read_pool():
+    return get_shard().get_read_pool()
+
+
+def use_read_pool():
+    # Thread initializer: every read helper called on this thread goes
+    # through the read-only pool and can never take the write lock
+    _thread.read_only = True
+
+
+def _primary_connection():
+    if getattr(_thread, "read_only", False):
+        return get_read_pool().connection()
+    return get_pool().connection()
+
+
+# --- Replica reads: opt-in per request/view, never for writes ---
+_replica_reads = contextvars.ContextVar("coffee_replica_reads", default=False)
+
+
+@contextmanager
+def use_replica():
+    # Reads inside go to the site's snapshot file while it is fresh enough,
+    # and fall back to the primary when it isn't
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def use_primary():
+    # For process-wide caches (live orders, queue, menu) that advance a cursor
+    # and are shared with views that must see their own writes: their reads
+    # never come from the replica, even inside a use_replica() render
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def connection():
+    if _replica_reads.get():
+        shard = get_shard()
+        if shard.replica_fresh():
+            return shard.get_replica_pool().connection()
+    return _primary_connection()
+
+
+# --- Per-site instances of process-wide caches (menu, live orders, ...) ---
+_per_site_caches = []
+
+
+class PerSite:
+    # Stands in for a module-level singleton: attribute access goes to the
+    # instance for the calling context's site, built on first use
+    def __init__(self, factory):
+        self._factory = factory
+        self._instances = {}
+        self._lock = threading.Lock()
+        _per_site_caches.append(self)
+
+    def reset(self):
+        # Later calls build fresh instances (see reset_shards)
+        with self._lock:
+            self._instances.clear()
+
+    def for_site(self, site=None):
+        site = site or current_site()
+        instance = self._instances.get(site)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(site)
+                if instance is None:
+                    with use_site(site):
+                        instance = self._instances[site] = self._factory()
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self.for_site(), name)
+
+
+# --- Cross-site fan-out: run a read on every shard in parallel ---
+def fan_out(fn, *args, site_keys=None, **kwargs):
+    # {site: fn(*args, **kwargs) evaluated against that site's shard}
+    site_keys = list(site_keys or sites())
+    # Workers inherit the caller's context (replica routing and the like)
+    context = contextvars.copy_context()
+
+    def at_site(site):
+        with use_site(site):
+            return fn(*args, **kwargs)
+
+    def run(site):
+        return context.copy().run(at_site, site)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(site_keys)), thread_name_prefix="site-fan-out") as pool:
+        return dict(zip(site_keys, pool.map(run, site_keys)))
+
+
+@contextmanager
+def transaction():
+    with _primary_connection() as conn:
+        if conn.in_transaction:
+            # Nested call: the outer transaction() owns commit/rollback
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        _thread.mutations = []
+        _thread.menu_changed = False
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            _thread.mutations = []
+            raise
+        else:
+            conn.commit()
+            site = current_site()
+            for listener in _commit_listeners:
+                listener(site)
+            if _thread.menu_changed:
+                for listener in _menu_listeners:
+                    listener(site)
+            mutations, _thread.mutations = _thread.mutations, []
+            if mutations:
+                for listener in _mutation_listeners:
+                    listener(site, mutations)
+
+
+# --- Commit hooks: in-process caches that want to hear about local writes ---
+_commit_listeners = []
+
+
+def on_commit(listener):
+    # listener(site) runs after each local commit
+    _commit_listeners.append(listener)
+
+
+# --- Menu hooks: in-process menu indexes rebuilt as soon as the menu is edited here ---
+_menu_listeners = []
+
+
+def on_menu_change(listener):
+    # listener(site) runs after each local commit that bumped menu_version
+    _menu_listeners.append(listener)
+
+
+# --- Mutation hooks: what each committed transaction did to orders (journal.py) ---
+_mutation_listeners = []
+
+
+def on_mutation(listener):
+    # listener(site, [(op, fields), ...]) runs after each local commit that
+    # changed orders, in the order the changes were made
+    _mutation_listeners.append(listener)
+
+
+def record_mutation(op, fields):
+    # Called last inside the write's transaction(), so a helper that raised
+    # (or a rolled-back savepoint around it) never gets recorded
+    if _mutation_listeners:
+        _thread.mutations.append((op, fields))
+
+
+@contextmanager
+def snapshot():
+    # Deferred read transaction: every SELECT inside sees the same WAL snapshot
+    with connection() as conn:
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.rollback()
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+# --- Base schema (formerly init_db/init_menu_options in each entry point) ---
+DEFAULT_MENU_OPTIONS = [
+    # Drinks
+    ("drink", "Please select a drink", 0),
+    ("drink", "Latte", 1),
+    ("drink", "Macchiato", 2),
+    ("drink", "Cold Brew", 3),
+    ("drink", "Americano", 4),
+
+    # Milk
+    ("milk", "Please select a milk option", 0),
+    ("milk", "1%", 1),
+    ("milk", "Almond", 2),
+    ("milk", "Fairlife", 3),
+    ("milk", "None", 99),
+
+    # Flavors (syrups)
+    ("flavor", "Please select a flavor", 0),
+    ("flavor", "Vanilla", 1),
+    ("flavor", "Hazelnut", 2),
+    ("flavor", "Mocha", 3),
+    ("flavor", "None", 99),
+
+    # Drizzles
+    ("drizzle", "Please select a drizzle", 0),
+    ("drizzle", "Chocolate Drizzle", 1),
+    ("drizzle", "Caramel Drizzle", 2),
+    ("drizzle", "None", 99),
+]
+
+
+def _create_base_schema(conn):
+    # Orders table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_name TEXT NOT NULL,
+            drink_type TEXT NOT NULL,
+            milk_type TEXT,
+            flavors TEXT,
+            pickup_time TEXT,
+            status TEXT DEFAULT 'pending',
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Add drizzle_type column if it doesn't exist yet
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    if "drizzle_type" not in cols:
+        conn.execute("ALTER TABLE orders ADD COLUMN drizzle_type TEXT")
+
+    # Menu options, with columns added over time for old DB compatibility
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS menu_options (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            label TEXT NOT NULL,
+            active INTEGER DEFAULT 1,
+            sort_order INTEGER DEFAULT 0,
+            UNIQUE(category, label)
+        )
+    ''')
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(menu_options)")]
+    if "sort_order" not in cols:
+        conn.execute("ALTER TABLE menu_options ADD COLUMN sort_order INTEGER DEFAULT 0")
+    if "espresso_enabled" not in cols:
+        conn.execute("ALTER TABLE menu_options ADD COLUMN espresso_enabled INTEGER DEFAULT 1")
+    if "cold_brew_enabled" not in cols:
+        conn.execute("ALTER TABLE menu_options ADD COLUMN cold_brew_enabled INTEGER DEFAULT 1")
+
+    # Ensure existing flavor rows get defaults if nulls exist
+    conn.execute("""
+        UPDATE menu_options
+        SET espresso_enabled = COALESCE(espresso_enabled, 1),
+            cold_brew_enabled = COALESCE(cold_brew_enabled, 1)
+        WHERE category = 'flavor'
+    """)
+
+    # Seed defaults only if table is empty
+    if conn.execute("SELECT COUNT(*) FROM menu_options").fetchone()[0] == 0:
+        conn.executemany(
+            "INSERT OR IGNORE INTO menu_options (category, label, sort_order) VALUES (?, ?, ?)",
+            DEFAULT_MENU_OPTIONS,
+        )
+
+
+# --- Versioned migrations (tracked in PRAGMA user_version) ---
+def _add_order_indexes(conn):
+    # Display/management filter on status and sort by time; reports slice by time
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_timestamp ON orders (status, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_timestamp ON orders (timestamp)")
+
+
+def _add_order_change_seq(conn):
+    # Monotonic change cursor: every insert/status change stamps the next value
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    if "change_seq" not in cols:
+        conn.execute("ALTER TABLE orders ADD COLUMN change_seq INTEGER")
+    conn.execute("UPDATE orders SET change_seq = id WHERE change_seq IS NULL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_change_seq ON orders (change_seq)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_change_seq (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute(
+        "INSERT OR IGNORE INTO order_change_seq (id, value) "
+        "SELECT 1, COALESCE(MAX(change_seq), 0) FROM orders"
+    )
+
+
+def _add_menu_version(conn):
+    # Bumped by every menu edit so each process knows when its menu cache is stale
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS menu_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO menu_version (id, value) VALUES (1, 1)")
+
+
+# Option columns tallied per day for the Inventory view
+USAGE_FIELDS = ("drink_type", "milk_type", "flavors", "drizzle_type")
+
+
+def _usage_trigger_body(sign, row):
+    # One upsert per option column; NULL options are not counted
+    return "\n".join(
+        f"""
+        INSERT INTO usage_counters (day, field, option, uses)
+        SELECT date({row}.timestamp), '{field}', {row}.{field}, {sign}1
+        WHERE {row}.{field} IS NOT NULL
+        ON CONFLICT (day, field, option) DO UPDATE SET uses = uses {sign} 1;"""
+        for field in USAGE_FIELDS
+    )
+
+
+def rebuild_usage_counters(conn):
+    # Recount from the order history (live and archived); cancelled orders
+    # don't use inventory
+    conn.execute("DELETE FROM usage_counters")
+    source = orders_source(conn)
+    for field in USAGE_FIELDS:
+        conn.execute(f"""
+            INSERT INTO usage_counters (day, field, option, uses)
+            SELECT date(timestamp), '{field}', {field}, COUNT(*)
+            FROM {source}
+            WHERE {field} IS NOT NULL AND status != 'cancelled'
+            GROUP BY date(timestamp), {field}
+        """)
+
+
+def _add_usage_counters(conn):
+    # Per-day, per-option usage maintained by triggers, so every writer (API,
+    # Streamlit, batch inserts, bulk updates) keeps it current without help
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usage_counters (
+            day TEXT NOT NULL,
+            field TEXT NOT NULL,
+            option TEXT NOT NULL,
+            uses INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, field, option)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS usage_counters_insert
+        AFTER INSERT ON orders
+        WHEN NEW.status IS NOT 'cancelled'
+        BEGIN {_usage_trigger_body('+', 'NEW')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS usage_counters_cancel
+        AFTER UPDATE OF status ON orders
+        WHEN OLD.status IS NOT 'cancelled' AND NEW.status = 'cancelled'
+        BEGIN {_usage_trigger_body('-', 'OLD')}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS usage_counters_uncancel
+        AFTER UPDATE OF status ON orders
+        WHEN OLD.status = 'cancelled' AND NEW.status IS NOT 'cancelled'
+        BEGIN {_usage_trigger_body('+', 'NEW')}
+        END
+    """)
+    rebuild_usage_counters(conn)
+
+
+# Seconds of barista time per drink, used by the queue scheduler
+DEFAULT_PREP_SECONDS = {
+    "Latte": 120,
+    "Macchiato": 150,
+    "Cold Brew": 45,
+    "Americano": 90,
+}
+
+
+def _add_menu_prep_seconds(conn):
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(menu_options)")]
+    if "prep_seconds" not in cols:
+        conn.execute("ALTER TABLE menu_options ADD COLUMN prep_seconds INTEGER")
+    conn.executemany(
+        "UPDATE menu_options SET prep_seconds = ? "
+        "WHERE category = 'drink' AND label = ? AND prep_seconds IS NULL",
+        [(seconds, label) for label, seconds in DEFAULT_PREP_SECONDS.items()],
+    )
+    bump_menu_version(conn)
+
+
+def _add_idempotency_keys(conn):
+    # Client-supplied key per submission; a retry with the same key maps back
+    # to the original order instead of inserting a duplicate
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(orders)")]
+    if "idempotency_key" not in cols:
+        conn.execute("ALTER TABLE orders ADD COLUMN idempotency_key TEXT")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_idempotency_key "
+        "ON orders (idempotency_key) WHERE idempotency_key IS NOT NULL"
+    )
+
+
+def _add_order_archives(conn):
+    # Registry of per-month archive tables (orders_archive_YYYY_MM); see archive.py
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS order_archives (
+            month TEXT PRIMARY KEY,
+            table_name TEXT NOT NULL,
+            rows INTEGER NOT NULL DEFAULT 0,
+            first_timestamp TEXT,
+            last_timestamp TEXT
+        )
+    """)
+
+
+# Reporting rollups: orders per day and per 15-minute interval (see reports.py)
+ROLLUP_INTERVAL_MINUTES = 15
+ROLLUP_BUCKETS = {
+    "day": "date({ts})",
+    "interval": (
+        "strftime('%Y-%m-%d %H:', {ts}) || "
+        f"printf('%02d', CAST(strftime('%M', {{ts}}) AS INTEGER) / {ROLLUP_INTERVAL_MINUTES} * {ROLLUP_INTERVAL_MINUTES})"
+    ),
+}
+
+
+def _rollup_trigger_body(row, orders, cancelled):
+    # orders/cancelled are the deltas applied to every bucket the row falls in
+    return "\n".join(
+        f"""
+        INSERT INTO order_rollups (granularity, bucket, orders, cancelled)
+        VALUES ('{granularity}', {bucket.format(ts=f"{row}.timestamp")}, {orders}, {cancelled})
+        ON CONFLICT (granularity, bucket) DO UPDATE SET
+            orders = orders + excluded.orders,
+            cancelled = cancelled + excluded.cancelled;"""
+        for granularity, bucket in ROLLUP_BUCKETS.items()
+    )
+
+
+def rebuild_order_rollups(conn):
+    conn.execute("DELETE FROM order_rollups")
+    source = orders_source(conn)
+    for granularity, bucket in ROLLUP_BUCKETS.items():
+        conn.execute(f"""
+            INSERT INTO order_rollups (granularity, bucket, orders, cancelled)
+            SELECT '{granularity}', {bucket.format(ts="timestamp")},
+                   SUM(status IS NOT 'cancelled'), SUM(status IS 'cancelled')
+            FROM {source}
+            GROUP BY 2
+        """)
+
+
+def _add_order_rollups(conn):
+    # Same trigger approach as usage_counters; cancelled orders are counted
+    # separately so a cancel/uncancel moves one order between the columns
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            orders INTEGER NOT NULL DEFAULT 0,
+            cancelled INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, bucket)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS order_rollups_insert
+        AFTER INSERT ON orders
+        BEGIN {_rollup_trigger_body('NEW', "NEW.status IS NOT 'cancelled'", "NEW.status IS 'cancelled'")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS order_rollups_cancel
+        AFTER UPDATE OF status ON orders
+        WHEN OLD.status IS NOT 'cancelled' AND NEW.status = 'cancelled'
+        BEGIN {_rollup_trigger_body('OLD', -1, 1)}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS order_rollups_uncancel
+        AFTER UPDATE OF status ON orders
+        WHEN OLD.status = 'cancelled' AND NEW.status IS NOT 'cancelled'
+        BEGIN {_rollup_trigger_body('NEW', 1, -1)}
+        END
+    """)
+    rebuild_order_rollups(conn)
+
+
+def _add_archived_idempotency_keys(conn):
+    # Keys of archived orders move here (see archive.py) and are never
+    # archived themselves, so a retry still maps back after its order leaves
+    # the live table
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_idempotency_keys (
+            idempotency_key TEXT PRIMARY KEY,
+            order_id INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    for (table,) in conn.execute("SELECT table_name FROM order_archives").fetchall():
+        conn.execute(f"""
+            INSERT OR IGNORE INTO archived_idempotency_keys (idempotency_key, order_id)
+            SELECT idempotency_key, id FROM {table} WHERE idempotency_key IS NOT NULL
+        """)
+
+
+# Append-only: each entry's position (1-based) is the user_version it produces
+MIGRATIONS = [
+    _add_order_indexes,
+    _add_order_change_seq,
+    _add_menu_version,
+    _add_usage_counters,
+    _add_menu_prep_seconds,
+    _add_idempotency_keys,
+    _add_order_archives,
+    _add_order_rollups,
+    _add_archived_idempotency_keys,
+]
+
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate():
+    # Runs once per process per site. Streamlit re-executes its script on every
+    # interaction, so after the first call this returns without touching the DB.
+    shard = get_shard()
+    if shard.migrated:
+        return
+    with shard.lock:
+        if shard.migrated:
+            return
+        with connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            _upgrade()
+        shard.migrated = True
+
+
+def migrate_all():
+    for site in sites():
+        with use_site(site):
+            migrate()
+
+
+def _upgrade():
+    with transaction() as conn:
+        # Re-read under the write lock: another process may have just upgraded
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        # Databases from before user_version tracking (and partially upgraded
+        # ones) get the idempotent base schema before any numbered step.
+        _create_base_schema(conn)
+        for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+
+# --- Orders ---
+ORDER_FIELDS = ("customer_name", "drink_type", "milk_type", "flavors", "drizzle_type", "pickup_time")
+ACTIVE_STATUSES = ("pending", "in_progress", "ready")
+CLOSED_STATUSES = ("complete", "cancelled")
+ORDER_STATUSES = ACTIVE_STATUSES + CLOSED_STATUSES
+# Every orders column, in table order. Archive tables are created with these;
+# a migration that adds a column to orders must add it to the archives too.
+ORDER_COLUMNS = (
+    "id", "customer_name", "drink_type", "milk_type", "flavors", "pickup_time",
+    "status", "timestamp", "drizzle_type", "change_seq", "idempotency_key",
+)
+
+
+def reserve_change_seqs(conn, count):
+    # Must run inside transaction(): BEGIN IMMEDIATE serialises the bump.
+    # Returns the first of `count` consecutive sequence numbers.
+    conn.execute("UPDATE order_change_seq SET value = value + ? WHERE id = 1", (count,))
+    return current_change_seq(conn) - count + 1
+
+
+def next_change_seq(conn):
+    return reserve_change_seqs(conn, 1)
+
+
+def current_change_seq(conn):
+    return conn.execute("SELECT value FROM order_change_seq WHERE id = 1").fetchone()[0]
+
+
+def insert_order(customer_name, drink_type, milk_type=None, flavors=None,
+                 drizzle_type=None, pickup_time=None, idempotency_key=None, timestamp=None):
+    return insert_order_once(
+        idempotency_key, customer_name, drink_type, milk_type, flavors,
+        drizzle_type, pickup_time, timestamp,
+    )[0]
+
+
+def utc_now():
+    # Same text SQLite's CURRENT_TIMESTAMP would store
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def insert_order_once(idempotency_key, customer_name, drink_type, milk_type=None,
+                      flavors=None, drizzle_type=None, pickup_time=None, timestamp=None):
+    # Returns (order_id, created). The key check runs under the write lock, so
+    # two concurrent retries can't both insert. timestamp is only passed when
+    # replaying a journal; new orders are stamped now.
+    timestamp = to_db_timestamp(timestamp) or utc_now()
+    with transaction() as conn:
+        if idempotency_key is not None:
+            existing = conn.execute(
+                "SELECT id FROM orders WHERE idempotency_key = ? "
+                "UNION ALL SELECT order_id FROM archived_idempotency_keys WHERE idempotency_key = ?",
+                (idempotency_key, idempotency_key),
+            ).fetchone()
+            if existing is not None:
+                return existing[0], False
+        cursor = conn.execute('''
+            INSERT INTO orders (customer_name, drink_type, milk_type, flavors, drizzle_type,
+                                pickup_time, timestamp, change_seq, idempotency_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (customer_name, drink_type, milk_type, flavors, drizzle_type, pickup_time,
+              timestamp, next_change_seq(conn), idempotency_key))
+        record_mutation("create", {
+            "id": cursor.lastrowid, "customer_name": customer_name, "drink_type": drink_type,
+            "milk_type": milk_type, "flavors": flavors, "drizzle_type": drizzle_type,
+            "pickup_time": pickup_time, "timestamp": timestamp, "idempotency_key": idempotency_key,
+        })
+        return cursor.lastrowid, True
+
+
+def insert_orders(orders, timestamps=None):
+    # Group/family orders: one transaction, one executemany, ids in input order.
+    # timestamps (one per order) is only passed when replaying a journal; new
+    # orders are all stamped now, whatever keys the order dicts carry.
+    if not orders:
+        return []
+    if timestamps is None:
+        stamps = [utc_now()] * len(orders)
+    else:
+        stamps = [to_db_timestamp(stamp) for stamp in timestamps]
+    with transaction() as conn:
+        first_seq = reserve_change_seqs(conn, len(orders))
+        conn.executemany(
+            f"INSERT INTO orders ({', '.join(ORDER_FIELDS)}, timestamp, change_seq) "
+            f"VALUES ({', '.join('?' for _ in ORDER_FIELDS)}, ?, ?)",
+            [
+                tuple(order.get(field) for field in ORDER_FIELDS) + (stamp, first_seq + offset)
+                for offset, (order, stamp) in enumerate(zip(orders, stamps))
+            ],
+        )
+        rows = conn.execute(
+            "SELECT id FROM orders WHERE change_seq >= ? ORDER BY change_seq ASC LIMIT ?",
+            (first_seq, len(orders)),
+        ).fetchall()
+        ids = [row["id"] for row in rows]
+        record_mutation("create_many", {
+            "ids": ids,
+            "orders": [
+                {**{field: order.get(field) for field in ORDER_FIELDS}, "timestamp": stamp}
+                for order, stamp in zip(orders, stamps)
+            ],
+        })
+        return ids
+
+
+def to_db_timestamp(value):
+    # Orders are stamped with naive UTC text (utc_now / CURRENT_TIMESTAMP)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def order_filters(statuses=None, start=None, end=None, search=None):
+    clauses = []
+    params = []
+    if search:
+        # Case-insensitive substring match on name, drink or status
+        pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append(
+            "(customer_name LIKE ? ESCAPE '\\' OR drink_type LIKE ? ESCAPE '\\' "
+            "OR status LIKE ? ESCAPE '\\')"
+        )
+        params.extend([pattern] * 3)
+    if statuses:
+        clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if start is not None:
+        clauses.append("timestamp >= ?")
+        params.append(to_db_timestamp(start))
+    if end is not None:
+        clauses.append("timestamp < ?")
+        params.append(to_db_timestamp(end))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+# --- Order history: live table plus any archive months a query reaches ---
+def archive_tables(conn, start=None, end=None):
+    # Archive tables holding orders in [start, end); empty before migration 7
+    if conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'order_archives'"
+    ).fetchone() is None:
+        return []
+    clauses = ["rows > 0"]
+    params = []
+    if start is not None:
+        clauses.append("last_timestamp >= ?")
+        params.append(to_db_timestamp(start))
+    if end is not None:
+        clauses.append("first_timestamp < ?")
+        params.append(to_db_timestamp(end))
+    rows = conn.execute(
+        f"SELECT table_name FROM order_archives WHERE {' AND '.join(clauses)} ORDER BY month",
+        params,
+    ).fetchall()
+    return [row["table_name"] for row in rows]
+
+
+def orders_source(conn, statuses=None, start=None, end=None):
+    # FROM target for history queries. Only closed orders are archived, so
+    # active-only queries and ranges with no archived months stay on the
+    # live table; otherwise the matching months are unioned in.
+    if statuses and not set(statuses) & set(CLOSED_STATUSES):
+        return "orders"
+    tables = archive_tables(conn, start, end)
+    if not tables:
+        return "orders"
+    columns = ", ".join(ORDER_COLUMNS)
+    parts = [f"SELECT {columns} FROM {table}" for table in ["orders", *tables]]
+    return f"({' UNION ALL '.join(parts)}) AS orders"
+
+
+def parse_statuses(value):
+    # ?status= filter: "active", or a comma-separated list of statuses
+    if not value:
+        return None
+    if value == "active":
+        return ACTIVE_STATUSES
+    return tuple(s.strip() for s in value.split(",") if s.strip())
+
+
+def fetch_orders(statuses=None, start=None, end=None, limit=None, offset=0, search=None):
+    where, params = order_filters(statuses, start, end, search)
+    with connection() as conn:
+        sql = (
+            f"SELECT * FROM {orders_source(conn, statuses, start, end)} {where} "
+            "ORDER BY timestamp DESC, id DESC"
+        )
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        return conn.execute(sql, params).fetchall()
+
+
+def count_orders(statuses=None, start=None, end=None, search=None):
+    where, params = order_filters(statuses, start, end, search)
+    with connection() as conn:
+        source = orders_source(conn, statuses, start, end)
+        return conn.execute(f"SELECT COUNT(*) FROM {source} {where}", params).fetchone()[0]
+
+
+def set_order_status(order_id, status):
+    with transaction() as conn:
+        cursor = conn.execute(
+            'UPDATE orders SET status = ?, change_seq = ? WHERE id = ?',
+            (status, next_change_seq(conn), order_id),
+        )
+        if cursor.rowcount:
+            record_mutation("status", {"id": order_id, "status": status})
+        return cursor.rowcount
+
+
+def set_order_statuses(updates):
+    # Bulk transitions in one transaction. Each update is a dict with id and
+    # status, plus an optional version (the change_seq the caller last saw):
+    # if the row has changed since, it is left alone and reported as a conflict.
+    results = []
+    with transaction() as conn:
+        for update in updates:
+            order_id = update["id"]
+            seq = next_change_seq(conn)
+            if update.get("version") is None:
+                cursor = conn.execute(
+                    'UPDATE orders SET status = ?, change_seq = ? WHERE id = ?',
+                    (update["status"], seq, order_id),
+                )
+            else:
+                cursor = conn.execute(
+                    'UPDATE orders SET status = ?, change_seq = ? WHERE id = ? AND change_seq = ?',
+                    (update["status"], seq, order_id, update["version"]),
+                )
+            if cursor.rowcount:
+                results.append({"id": order_id, "outcome": "updated", "version": seq})
+                continue
+
+            current = conn.execute(
+                "SELECT status, change_seq FROM orders WHERE id = ?", (order_id,)
+            ).fetchone()
+            if current is None:
+                results.append({"id": order_id, "outcome": "not_found"})
+            else:
+                results.append({
+                    "id": order_id,
+                    "outcome": "conflict",
+                    "status": current["status"],
+                    "version": current["change_seq"],
+                })
+        applied = [
+            {"id": update["id"], "status": update["status"]}
+            for update, result in zip(updates, results)
+            if result["outcome"] == "updated"
+        ]
+        if applied:
+            record_mutation("statuses", {"updates": applied})
+    return results
+
+
+# --- Incremental change feed ---
+def fetch_active_with_cursor():
+    # Initial load for a feed consumer: active orders plus the cursor they reflect
+    with snapshot() as conn:
+        rows = conn.execute(
+            f"SELECT * FROM orders WHERE status IN ({', '.join('?' for _ in ACTIVE_STATUSES)}) "
+            "ORDER BY timestamp DESC, id DESC",
+            ACTIVE_STATUSES,
+        ).fetchall()
+        return rows, current_change_seq(conn)
+
+
+def current_cursor():
+    with connection() as conn:
+        return current_change_seq(conn)
+
+
+def fetch_changes(since, limit=None):
+    # Rows changed after `since`, oldest change first, and the cursor to resume from
+    with snapshot() as conn:
+        sql = "SELECT * FROM orders WHERE change_seq > ? ORDER BY change_seq ASC"
+        params = [since]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = conn.execute(sql, params).fetchall()
+        if limit is not None and len(rows) == limit:
+            cursor = rows[-1]["change_seq"]
+        else:
+            cursor = max(current_change_seq(conn), since)
+        return rows, cursor
+
+
+# --- Menu options ---
+def current_menu_version(conn):
+    return conn.execute("SELECT value FROM menu_version WHERE id = 1").fetchone()[0]
+
+
+def bump_menu_version(conn):
+    # Must run inside the transaction() that edits menu_options
+    conn.execute("UPDATE menu_version SET value = value + 1 WHERE id = 1")
+    _thread.menu_changed = True
+
+
+def menu_version():
+    with connection() as conn:
+        return current_menu_version(conn)
+
+
+def fetch_menu_options():
+    # Whole menu plus the version it reflects, read from one snapshot
+    with snapshot() as conn:
+        rows = conn.execute(
+            "SELECT * FROM menu_options ORDER BY category, sort_order, label"
+        ).fetchall()
+        return rows, current_menu_version(conn)
+
+
+def add_menu_item(category, label):
+    with transaction() as conn:
+        # append to bottom of category
+        max_sort = conn.execute(
+            "SELECT COALESCE(MAX(sort_order), 0) FROM menu_options WHERE category = ?",
+            (category,),
+        ).fetchone()[0]
+        cursor = conn.execute(
+            "INSERT INTO menu_options (category, label, sort_order) VALUES (?, ?, ?)",
+            (category, label, max_sort + 1),
+        )
+        bump_menu_version(conn)
+        return cursor.lastrowid
+
+
+def update_menu_item(item_id, active, espresso_enabled=None, cold_brew_enabled=None):
+    with transaction() as conn:
+        conn.execute(
+            """
+            UPDATE menu_options
+            SET active = ?,
+                espresso_enabled = COALESCE(?, espresso_enabled),
+                cold_brew_enabled = COALESCE(?, cold_brew_enabled)
+            WHERE id = ?
+            """,
+            (
+                int(active),
+                None if espresso_enabled is None else int(espresso_enabled),
+                None if cold_brew_enabled is None else int(cold_brew_enabled),
+                item_id,
+            ),
+        )
+        bump_menu_version(conn)
+
+
+def set_menu_prep_seconds(item_id, prep_seconds):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE menu_options SET prep_seconds = ? WHERE id = ?",
+            (int(prep_seconds), item_id),
+        )
+        bump_menu_version(conn)
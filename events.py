@@ -0,0 +1,110 @@
+import queue
+import threading
+
+import db
+
+# How often the watcher checks for writes made by other processes (e.g. the
+# Streamlit app). Writes made through this process wake it immediately.
+POLL_INTERVAL = 1.0
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+# --- One live subscriber's queue of change batches ---
+class Subscriber(queue.Queue):
+    # Set by the broadcaster when the client falls too far behind; the stream
+    # then ends so the browser's EventSource reconnects with Last-Event-ID
+    dropped = False
+
+
+# --- Fan-out of order changes to live subscribers (one per site) ---
+class OrderBroadcaster:
+    def __init__(self, poll_interval=POLL_INTERVAL, queue_size=SUBSCRIBER_QUEUE_SIZE):
+        self.site = db.current_site()
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.cursor = None
+        self.reads = 0
+        self.published = 0
+        self.dropped = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self.cursor = db.current_cursor()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"order-broadcaster-{self.site}", daemon=True
+                )
+                self._thread.start()
+
+    def subscribe(self):
+        self._ensure_started()
+        subscriber = Subscriber(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def notify(self):
+        # Called after a local commit so subscribers don't wait for the next poll
+        self._wake.set()
+
+    def _run(self):
+        # New threads start on the default site; pin this one to ours
+        db.set_site(self.site)
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            with self._lock:
+                idle = not self._subscribers
+            if idle:
+                continue
+            try:
+                self.poll()
+            except Exception:
+                # Keep the broadcaster alive through a locked/unavailable DB
+                continue
+
+    def poll(self):
+        # One read per batch of changes, however many screens are listening
+        rows, cursor = db.fetch_changes(self.cursor)
+        self.reads += 1
+        self.cursor = cursor
+        if rows:
+            self.publish([dict(row) for row in rows])
+
+    def publish(self, orders):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(orders)
+            except queue.Full:
+                # A stalled client is cut loose; its stream closes and the
+                # browser resumes with Last-Event-ID
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+                self.dropped += 1
+        self.published += len(orders)
+
+    def stats(self):
+        return {
+            "subscribers": self.subscriber_count(),
+            "cursor": self.cursor,
+            "reads": self.reads,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broadcaster = db.PerSite(OrderBroadcaster)
@@ -0,0 +1,119 @@
+import csv
+import io
+
+import db
+
+EXPORT_COLUMNS = (
+    "id", "customer_name", "drink_type", "milk_type", "flavors",
+    "drizzle_type", "pickup_time", "status", "timestamp",
+)
+BATCH_SIZE = 500
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+# --- Row source: keyset pages on (timestamp, id), connection released between pages ---
+# A slow download never pins a pooled connection or holds a read snapshot
+# (which would stop WAL checkpoints); each page is its own short read.
+def iter_order_batches(statuses=None, start=None, end=None, batch_size=BATCH_SIZE):
+    where, params = db.order_filters(statuses, start, end)
+    after = None
+    while True:
+        clauses, page_params = where, list(params)
+        if after is not None:
+            clauses = f"{where} AND (timestamp, id) > (?, ?)" if where else "WHERE (timestamp, id) > (?, ?)"
+            page_params.extend(after)
+        with db.connection() as conn:
+            source = db.orders_source(conn, statuses, start, end)
+            rows = conn.execute(
+                f"SELECT {', '.join(EXPORT_COLUMNS)} FROM {source} {clauses} "
+                "ORDER BY timestamp ASC, id ASC LIMIT ?",
+                [*page_params, batch_size],
+            ).fetchall()
+        if not rows:
+            break
+        yield rows
+        if len(rows) < batch_size:
+            break
+        after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+
+# --- CSV: yields one encoded chunk per batch ---
+def iter_csv(statuses=None, start=None, end=None, batch_size=BATCH_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in iter_order_batches(statuses, start, end, batch_size):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# --- Parquet: one row group per batch (needs pyarrow) ---
+class _ChunkSink:
+    # Minimal writable file object that hands written bytes back to the caller
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_parquet(statuses=None, start=None, end=None, batch_size=BATCH_SIZE):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        *[(column, pa.string()) for column in EXPORT_COLUMNS[1:]],
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in iter_order_batches(statuses, start, end, batch_size):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_export(export_format, statuses=None, start=None, end=None):
+    if export_format == "parquet":
+        return iter_parquet(statuses, start, end)
+    return iter_csv(statuses, start, end)
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+# Double-taps and Wi-Fi retries land within seconds; the unique index in the
+# database still catches anything older than this
+KEY_TTL_SECONDS = 600
+MAX_KEYS = 10000
+MAX_KEY_LENGTH = 255
+
+
+# --- Recently seen keys -> order ids, bounded and expiring ---
+class RecentKeys:
+    def __init__(self, ttl=KEY_TTL_SECONDS, max_size=MAX_KEYS):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, order_id):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (order_id, now + self.ttl)
+            self._entries.move_to_end(key)
+            # Oldest entries sit at the front: drop expired ones, then trim to size
+            while self._entries:
+                oldest_key, (_, expires_at) = next(iter(self._entries.items()))
+                if expires_at > now and len(self._entries) <= self.max_size:
+                    break
+                del self._entries[oldest_key]
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+recent_keys = db.PerSite(RecentKeys)
+
+
+def valid_key(key):
+    return key is None or (isinstance(key, str) and 0 < len(key) <= MAX_KEY_LENGTH)
+
+
+def submit_order_once(idempotency_key, customer_name, drink_type, milk_type=None,
+                      flavors=None, drizzle_type=None, pickup_time=None):
+    # Returns (order_id, replayed). A key seen recently in this process is
+    # answered from memory with no database round trip.
+    if idempotency_key is not None:
+        order_id = recent_keys.get(idempotency_key)
+        if order_id is not None:
+            return order_id, True
+    order_id, created = db.insert_order_once(
+        idempotency_key, customer_name, drink_type, milk_type, flavors,
+        drizzle_type, pickup_time,
+    )
+    if idempotency_key is not None:
+        recent_keys.put(idempotency_key, order_id)
+    return order_id, not created
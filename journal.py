@@ -0,0 +1,259 @@
+import argparse
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+import db
+
+# Append-only JSON-lines journal of every committed order mutation, one file
+# per site next to its database (database.db -> database.journal.jsonl).
+# Writers only hand the mutation to a queue after their commit; a background
+# thread wakes every COFFEE_JOURNAL_FLUSH_INTERVAL seconds while there is
+# work, writes everything queued in one write(), and fsyncs per
+# COFFEE_JOURNAL_FSYNC:
+#   "batch"  fsync after every batch (default; a crash loses nothing committed
+#            more than one batch ago)
+#   "off"    leave it to the OS
+#   <secs>   fsync at most once per that many seconds
+JOURNAL_ENABLED = os.environ.get("COFFEE_JOURNAL", "1") != "0"
+FSYNC = os.environ.get("COFFEE_JOURNAL_FSYNC", "batch")
+FLUSH_INTERVAL = float(os.environ.get("COFFEE_JOURNAL_FLUSH_INTERVAL", "0.05"))
+MAX_BATCH = 10000
+YIELD_EVERY = 32
+
+
+def journal_path(path):
+    root, _ = os.path.splitext(path)
+    return f"{root}.journal.jsonl"
+
+
+def _fsync_interval(policy):
+    if policy == "batch":
+        return 0.0
+    if policy == "off":
+        return None
+    return float(policy)
+
+
+# --- Recorder: db.on_mutation listener plus one writer thread ---
+class Journal:
+    def __init__(self, fsync=FSYNC, flush_interval=FLUSH_INTERVAL):
+        self.fsync_interval = _fsync_interval(fsync)
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.files = {}
+        self.synced_at = {}
+        self.entries = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                db.on_mutation(self.record)
+                self._thread = threading.Thread(target=self._run, name="order-journal", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def record(self, site, mutations):
+        # Runs on the writer's thread right after its commit: O(1), no I/O
+        self.queue.put((time.time(), site, mutations))
+
+    def flush(self, timeout=5):
+        # Blocks until everything recorded so far is written (and synced per policy)
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Let a rush pile up: one write and one fsync per interval, not per order
+            time.sleep(self.flush_interval)
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in batch if not isinstance(item, threading.Event)])
+            except OSError as error:
+                print(f"order journal: write failed: {error}", file=sys.stderr)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, batch):
+        lines = {}
+        for n, (ts, site, mutations) in enumerate(batch, start=1):
+            site_lines = lines.setdefault(site, [])
+            for op, fields in mutations:
+                site_lines.append(json.dumps({"ts": round(ts, 6), "op": op, **fields}, separators=(",", ":")))
+            if n % YIELD_EVERY == 0:
+                # Hand the GIL back so a request thread never waits on a whole batch
+                time.sleep(0)
+        for site, site_lines in lines.items():
+            f = self._file(site)
+            f.write(("\n".join(site_lines) + "\n").encode("utf-8"))
+            self.entries += len(site_lines)
+            self._sync(site, f)
+        if lines:
+            self.batches += 1
+
+    def _file(self, site):
+        f = self.files.get(site)
+        if f is None:
+            # Unbuffered O_APPEND: each batch is one write(), so the Flask and
+            # Streamlit processes can share a site's journal without tearing lines
+            f = self.files[site] = open(journal_path(db.site_path(site)), "ab", buffering=0)
+        return f
+
+    def _sync(self, site, f):
+        if self.fsync_interval is None:
+            return
+        now = time.monotonic()
+        if now - self.synced_at.get(site, 0.0) >= self.fsync_interval:
+            os.fsync(f.fileno())
+            self.synced_at[site] = now
+            self.fsyncs += 1
+
+    def stats(self):
+        return {
+            "enabled": self._thread is not None,
+            "entries": self.entries,
+            "batches": self.batches,
+            "fsyncs": self.fsyncs,
+            "queued": self.queue.qsize(),
+        }
+
+
+journal = Journal()
+
+
+def start():
+    if JOURNAL_ENABLED:
+        journal.start()
+
+
+# --- Replay ---
+def read_entries(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write
+                continue
+
+
+def paced(entries, speed):
+    # Yields entries on the recorded schedule divided by speed; 0 = no waiting
+    started = first_ts = None
+    for entry in entries:
+        if speed > 0:
+            if first_ts is None:
+                started, first_ts = time.monotonic(), entry["ts"]
+            wait = (entry["ts"] - first_ts) / speed - (time.monotonic() - started)
+            if wait > 0:
+                time.sleep(wait)
+        yield entry
+
+
+def apply_entry(entry, ids):
+    # Re-applies one mutation through the same db helpers; ids maps recorded
+    # order ids to the ones this database assigned. Returns the status updates
+    # it could not apply because their order hasn't been created yet.
+    op = entry["op"]
+    if op == "create":
+        fields = {field: entry.get(field) for field in db.ORDER_FIELDS}
+        ids[entry["id"]] = db.insert_order(
+            idempotency_key=entry.get("idempotency_key"), timestamp=entry.get("timestamp"), **fields
+        )
+    elif op == "create_many":
+        new_ids = db.insert_orders(
+            entry["orders"], timestamps=[order["timestamp"] for order in entry["orders"]]
+        )
+        ids.update(zip(entry["ids"], new_ids))
+    elif op == "status":
+        if entry["id"] not in ids:
+            return [{"id": entry["id"], "status": entry["status"]}]
+        db.set_order_status(ids[entry["id"]], entry["status"])
+    elif op == "statuses":
+        updates = [
+            {"id": ids[update["id"]], "status": update["status"]}
+            for update in entry["updates"] if update["id"] in ids
+        ]
+        if updates:
+            db.set_order_statuses(updates)
+        return [
+            {"id": update["id"], "status": update["status"]}
+            for update in entry["updates"] if update["id"] not in ids
+        ]
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+    return []
+
+
+def replay(path, speed=0.0):
+    # Rebuilds the current site's database from a journal; returns
+    # (mutations applied, status updates skipped). The Flask and Streamlit
+    # processes flush to the same file independently, so a status change can
+    # land before its order's create: it is held until the create shows up,
+    # and only counted as skipped if it never does.
+    ids = {}
+    held = {}
+    count = 0
+    for entry in paced(read_entries(path), speed):
+        for update in apply_entry(entry, ids):
+            held.setdefault(update["id"], []).append(update)
+        for recorded_id in [recorded_id for recorded_id in held if recorded_id in ids]:
+            for update in held.pop(recorded_id):
+                apply_entry({"op": "status", **update}, ids)
+        count += 1
+    skipped = [update for updates in held.values() for update in updates]
+    return count, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order mutation journal: replay into a database")
+    parser.add_argument("command", choices=["replay"])
+    parser.add_argument("journal", help="journal file to read")
+    parser.add_argument("--database", required=True,
+                        help="database file to rebuild (must not exist yet)")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="0 = as fast as possible, 1 = recorded pace, 10 = ten times faster")
+    args = parser.parse_args()
+
+    if os.path.exists(args.database):
+        parser.error(f"{args.database} already exists; replay rebuilds from scratch")
+    # The recorder isn't started here, so replayed writes aren't journaled again.
+    # The default site is pointed at --database even when COFFEE_SITES maps it
+    # to a live file, so a replay can never write into production.
+    db.DATABASE = args.database
+    db.register_site(db.DEFAULT_SITE, args.database)
+    db.reset_shards()
+    db.set_site(db.DEFAULT_SITE)
+    db.migrate()
+    started = time.perf_counter()
+    count, skipped = replay(args.journal, args.speed)
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {count} mutations into {db.site_path(db.DEFAULT_SITE)} in {elapsed:.2f}s")
+    if skipped:
+        print(f"Skipped {len(skipped)} status updates for orders never created in this journal: "
+              f"{', '.join(str(update['id']) for update in skipped)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
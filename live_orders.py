@@ -0,0 +1,150 @@
+import sys
+import threading
+import time
+
+import db
+
+# Writes in this process mark the store dirty through db.on_commit; writes
+# made by another process (the API vs the Streamlit app) are picked up by a
+# change-feed read at most this often
+MAX_STALENESS_SECONDS = 0.5
+# A replica-fed store (display screens, read-only endpoints) is only ever
+# behind by the replica's lag (db.REPLICA_MAX_STALENESS) plus this
+
+# Menu-derived columns repeat across every order; one shared string each
+INTERNED_FIELDS = ("drink_type", "milk_type", "flavors", "drizzle_type", "pickup_time", "status")
+
+
+# --- Compact active-order record ---
+class LiveOrder:
+    __slots__ = db.ORDER_COLUMNS
+
+    def __init__(self, row):
+        for column in db.ORDER_COLUMNS:
+            value = row[column]
+            if column in INTERNED_FIELDS and value is not None:
+                value = sys.intern(value)
+            setattr(self, column, value)
+
+    def __getitem__(self, column):
+        # Lets render.py and the views index a record like a sqlite3.Row
+        return getattr(self, column)
+
+    def as_dict(self):
+        return {column: getattr(self, column) for column in db.ORDER_COLUMNS}
+
+
+def _newest_first(order):
+    return (order.timestamp, order.id)
+
+
+# --- Process-wide store of active orders, bucketed by status (one per site) ---
+class LiveOrderStore:
+    def __init__(self, max_staleness=MAX_STALENESS_SECONDS, replica=False):
+        self.site = db.current_site()
+        self.max_staleness = max_staleness
+        self.replica = replica
+        self.buckets = {status: {} for status in db.ACTIVE_STATUSES}
+        self.status_of = {}
+        self.cursor = None
+        self.synced_at = 0.0
+        self.dirty = True
+        self.reads = 0
+        self.syncs = 0
+        self._sorted = None
+        self._lock = threading.Lock()
+        if not replica:
+            # A local commit isn't in the replica yet; the replica store just
+            # polls on max_staleness
+            db.on_commit(self.mark_dirty)
+
+    def mark_dirty(self, site):
+        if site == self.site:
+            self.dirty = True
+
+    def _apply(self, row):
+        order_id = row["id"]
+        old_status = self.status_of.pop(order_id, None)
+        if old_status is not None:
+            del self.buckets[old_status][order_id]
+        bucket = self.buckets.get(row["status"])
+        if bucket is not None:
+            bucket[order_id] = LiveOrder(row)
+            self.status_of[order_id] = row["status"]
+
+    def sync(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not (force or self.dirty or now - self.synced_at >= self.max_staleness):
+                return
+            # Cleared before reading so a commit landing mid-read marks it again
+            self.dirty = False
+            # The primary store backs Manage Orders, which must see its own
+            # writes. The replica store reads the replica while it is fresh and
+            # falls back to the primary when it isn't; fetch_changes never moves
+            # the cursor backwards, so switching between the two is safe.
+            with db.use_site(self.site), (db.use_replica() if self.replica else db.use_primary()):
+                if self.cursor is None:
+                    rows, self.cursor = db.fetch_active_with_cursor()
+                    for bucket in self.buckets.values():
+                        bucket.clear()
+                    self.status_of.clear()
+                else:
+                    rows, self.cursor = db.fetch_changes(self.cursor)
+            for row in rows:
+                self._apply(row)
+            if rows:
+                self._sorted = None
+            self.synced_at = now
+            self.syncs += 1
+
+    def active(self):
+        # Newest first, like db.fetch_orders(ACTIVE_STATUSES); rebuilt only after a change
+        self.sync()
+        with self._lock:
+            self.reads += 1
+            if self._sorted is None:
+                orders = [order for bucket in self.buckets.values() for order in bucket.values()]
+                self._sorted = sorted(orders, key=_newest_first, reverse=True)
+            return self._sorted
+
+    def by_status(self, status):
+        self.sync()
+        with self._lock:
+            self.reads += 1
+            return sorted(self.buckets.get(status, {}).values(), key=_newest_first, reverse=True)
+
+    def counts(self):
+        self.sync()
+        with self._lock:
+            return {status: len(bucket) for status, bucket in self.buckets.items()}
+
+    def page(self, search=None, page=1, page_size=25):
+        # Same matching as db.order_filters(search=...): substring of name,
+        # drink or status, case-insensitive
+        orders = self.active()
+        needle = (search or "").strip().lower()
+        if needle:
+            orders = [
+                o for o in orders
+                if needle in o.customer_name.lower()
+                or needle in o.drink_type.lower()
+                or needle in o.status.lower()
+            ]
+        start = (page - 1) * page_size
+        return orders[start:start + page_size], len(orders)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "source": "replica" if self.replica else "primary",
+                "orders": len(self.status_of),
+                "cursor": self.cursor,
+                "reads": self.reads,
+                "syncs": self.syncs,
+            }
+
+
+live_orders = db.PerSite(LiveOrderStore)
+# Display screens and read-only endpoints: kept off the primary
+replica_live_orders = db.PerSite(lambda: LiveOrderStore(replica=True))
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+
+import db
+import metrics
+
+
+def flavor_key(drink_type):
+    # Flavors are filtered by drink: cold brew vs espresso-based (Latte, Macchiato, ...)
+    if str(drink_type or "").strip().lower() == "cold brew":
+        return "cold_brew"
+    return "espresso"
+
+
+# Order validation trusts the in-memory index for this long before re-reading
+# menu_version; menu edits made in this process rebuild it straight away
+VALIDATION_RECHECK_SECONDS = float(os.environ.get("COFFEE_MENU_RECHECK_SECONDS", "1"))
+NO_OPTIONS = frozenset()
+
+
+# --- Process-wide menu cache, invalidated through menu_version in the DB ---
+class MenuCache:
+    def __init__(self):
+        self.site = db.current_site()
+        self.version = None
+        self.checked_at = None
+        self.items = {}
+        self.index = {}
+        self.rows = []
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+        db.on_menu_change(self.mark_stale)
+
+    def mark_stale(self, site):
+        if site == self.site:
+            self.invalidate()
+
+    def _build(self, rows):
+        items = {}
+        for row in rows:
+            if not row["active"]:
+                continue
+            category = row["category"]
+            items.setdefault((category, None), []).append(row["label"])
+            if category == "flavor":
+                if row["espresso_enabled"]:
+                    items.setdefault((category, "espresso"), []).append(row["label"])
+                if row["cold_brew_enabled"]:
+                    items.setdefault((category, "cold_brew"), []).append(row["label"])
+        return items
+
+    def refresh(self):
+        # One cheap single-row read decides whether the cached menu is still current
+        checked_at = time.monotonic()
+        with db.use_primary():
+            version = db.menu_version()
+        with self._lock:
+            if version == self.version:
+                self.checked_at = checked_at
+                self.hits += 1
+                return
+            self.misses += 1
+
+        with db.use_primary():
+            rows, version = db.fetch_menu_options()
+        rows = [dict(row) for row in rows]
+        items = self._build(rows)
+        # (category, None) -> every active label; ("flavor", drink key) -> the
+        # flavors that drink allows. Sets, so validation is a lookup per field
+        index = {key: frozenset(labels) for key, labels in items.items()}
+        with self._lock:
+            self.rows = rows
+            self.items = items
+            self.index = index
+            self.version = version
+            self.checked_at = checked_at
+            self.reloads += 1
+
+    def index_stale(self):
+        # Invalidated, or older than the recheck window
+        checked_at = self.checked_at
+        return (
+            self.version is None
+            or checked_at is None
+            or time.monotonic() - checked_at >= VALIDATION_RECHECK_SECONDS
+        )
+
+    def validation_index(self):
+        # No DB read unless the index is stale
+        if self.index_stale():
+            self.refresh()
+        return self.index
+
+    def active_items(self, category, drink_type=None):
+        self.refresh()
+        key = flavor_key(drink_type) if category == "flavor" and drink_type else None
+        return list(self.items.get((category, key), []))
+
+    def all_items(self):
+        self.refresh()
+        return list(self.rows)
+
+    def invalidate(self):
+        with self._lock:
+            self.version = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+
+menu_cache = db.PerSite(MenuCache)
+
+
+@metrics.instrumented("get_active_menu_items")
+def get_active_menu_items(category, drink_type=None):
+    return menu_cache.active_items(category, drink_type)
+
+
+# --- Order line validation against the active menu ---
+REQUIRED_FIELDS = ("customer_name", "drink_type")
+MENU_FIELDS = (
+    ("drink_type", "drink"),
+    ("milk_type", "milk"),
+    ("flavors", "flavor"),
+    ("drizzle_type", "drizzle"),
+)
+
+
+def is_placeholder(label):
+    # Seeded "Please select a ..." rows sit at the top of each category
+    return str(label or "").startswith("Please")
+
+
+def validate_order(order):
+    # Returns a list of human-readable problems; empty means the line is valid
+    errors = []
+    for field in REQUIRED_FIELDS:
+        if not str(order.get(field) or "").strip():
+            errors.append(f"Missing required field: {field}")
+    if errors:
+        return errors
+
+    drink_type = order["drink_type"]
+    if is_placeholder(drink_type) or is_placeholder(order.get("milk_type")):
+        errors.append("Please select a drink and milk type")
+
+    index = menu_cache.validation_index()
+    for field, category in MENU_FIELDS:
+        value = order.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str) or value not in index.get((category, None), NO_OPTIONS):
+            errors.append(f"Unknown or unavailable {category}: {value}")
+        elif category == "flavor" and value not in index.get(
+            (category, flavor_key(drink_type)), NO_OPTIONS
+        ):
+            errors.append(f"{value} is not available with {drink_type}")
+    return errors
@@ -0,0 +1,200 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+# Seconds; tuned for SQLite calls that usually take well under a millisecond
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+# --- Histogram with Prometheus-style cumulative buckets ---
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self.series.get(key)
+            if counts is None:
+                counts = self.series[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            counts[0][index] += 1
+            counts[1] += 1
+            counts[2] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {key: (list(c[0]), c[1], c[2]) for key, c in self.series.items()}
+
+    def quantile(self, key, q):
+        # Upper bound of the bucket holding the q-th observation
+        buckets, count, _ = self.snapshot().get(key, (None, 0, 0))
+        if not count:
+            return None
+        target = q * count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), buckets):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.series)
+
+
+operation_seconds = Histogram(
+    "coffee_operation_seconds", "Wall time of instrumented hot-path operations")
+query_seconds = Histogram(
+    "coffee_query_seconds", "SQLite statement execution time")
+connection_open_seconds = Histogram(
+    "coffee_connection_open_seconds", "Time to open and configure a pooled SQLite connection")
+commit_seconds = Histogram(
+    "coffee_commit_seconds", "SQLite COMMIT time")
+rows_returned = Counter(
+    "coffee_query_rows_returned_total", "Rows fetched from SQLite statements")
+vm_steps = Counter(
+    "coffee_db_vm_steps_total",
+    "SQLite virtual machine steps (in units of VM_STEP_INTERVAL); a proxy for rows scanned")
+
+HISTOGRAMS = (operation_seconds, query_seconds, connection_open_seconds, commit_seconds)
+COUNTERS = (rows_returned, vm_steps)
+
+# The progress handler fires once per this many SQLite VM instructions
+VM_STEP_INTERVAL = 1000
+
+
+# --- Which hot-path operation the current thread is inside ---
+_local = threading.local()
+
+
+def current_operation():
+    return getattr(_local, "operation", None) or "other"
+
+
+@contextmanager
+def operation(name):
+    outer = getattr(_local, "operation", None)
+    _local.operation = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        operation_seconds.observe(time.perf_counter() - start, operation=name)
+        _local.operation = outer
+
+
+def instrumented(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_TABLE_RE = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE|INDEX|TRIGGER|ON)\s+(?:IF\s+NOT\s+EXISTS\s+|IF\s+EXISTS\s+)?([A-Za-z_]\w*)",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=512)
+def statement_label(sql):
+    # "SELECT orders", "UPDATE order_change_seq", "BEGIN", ...
+    words = sql.split(None, 1)
+    if not words:
+        return "unknown"
+    verb = words[0].upper()
+    match = _TABLE_RE.search(sql)
+    return f"{verb} {match.group(1)}" if match else verb
+
+
+def count_vm_steps():
+    vm_steps.inc(operation=current_operation())
+    return 0
+
+
+# --- Prometheus text exposition ---
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{str(value).replace(chr(34), chr(39))}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus(gauges=None):
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.append(f"# HELP {histogram.name} {histogram.help_text}")
+        lines.append(f"# TYPE {histogram.name} histogram")
+        for key, (buckets, count, total) in sorted(histogram.snapshot().items()):
+            cumulative = 0
+            for bound, n in zip(histogram.buckets, buckets):
+                cumulative += n
+                lines.append(f"{histogram.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{histogram.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{histogram.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{histogram.name}_count{_format_labels(key)} {count}")
+    for counter in COUNTERS:
+        lines.append(f"# HELP {counter.name} {counter.help_text}")
+        lines.append(f"# TYPE {counter.name} counter")
+        for key, value in sorted(counter.snapshot().items()):
+            lines.append(f"{counter.name}{_format_labels(key)} {value}")
+    for name, (help_text, value) in sorted((gauges or {}).items()):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# --- Summary rows for the Streamlit diagnostics panel ---
+def operation_summary():
+    rows = []
+    for key, (_, count, total) in sorted(operation_seconds.snapshot().items()):
+        rows.append({
+            "operation": dict(key)["operation"],
+            "calls": count,
+            "avg_ms": round(total / count * 1000, 3),
+            "p95_ms": round(operation_seconds.quantile(key, 0.95) * 1000, 3),
+        })
+    return rows
+
+
+def query_summary():
+    rows = []
+    returned = rows_returned.snapshot()
+    for key, (_, count, total) in sorted(query_seconds.snapshot().items()):
+        labels = dict(key)
+        rows.append({
+            "operation": labels["operation"],
+            "statement": labels["statement"],
+            "calls": count,
+            "avg_ms": round(total / count * 1000, 3),
+            "rows_returned": returned.get(key, 0),
+        })
+    return rows
@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+
+import db
+
+PAGE_SIZE = 25
+MAX_PAGES = 64
+
+
+# --- Management view pages, cached until the next order write ---
+class OrderPageCache:
+    # Each entry is one page of results plus the total match count. Any write
+    # bumps the order change sequence, so one single-row read tells whether the
+    # cache is still current; if not, every cached page is dropped.
+    def __init__(self, max_pages=MAX_PAGES):
+        self.max_pages = max_pages
+        self.cursor = None
+        self.pages = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def _check(self, cursor):
+        if cursor != self.cursor:
+            if self.pages:
+                self.invalidations += 1
+            self.pages.clear()
+            self.cursor = cursor
+
+    def page(self, statuses=None, search=None, page=1, page_size=PAGE_SIZE):
+        # Returns (rows, total) for the 1-based page
+        search = (search or "").strip() or None
+        key = (tuple(statuses) if statuses else None, search, page, page_size)
+        cursor = db.current_cursor()
+        with self._lock:
+            self._check(cursor)
+            cached = self.pages.get(key)
+            if cached is not None:
+                self.pages.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        total = db.count_orders(statuses, search=search)
+        rows = [
+            dict(row) for row in db.fetch_orders(
+                statuses, limit=page_size, offset=(page - 1) * page_size, search=search,
+            )
+        ]
+        with self._lock:
+            # Only keep it if nothing was written while it was being read
+            if cursor == self.cursor:
+                self.pages[key] = (rows, total)
+                while len(self.pages) > self.max_pages:
+                    self.pages.popitem(last=False)
+        return rows, total
+
+    def invalidate(self):
+        with self._lock:
+            self.cursor = None
+            self.pages.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pages": len(self.pages),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+order_pages = db.PerSite(OrderPageCache)
@@ -0,0 +1,79 @@
+from datetime import datetime
+from functools import lru_cache
+
+import pytz
+
+# Built once per process instead of on every rerun
+CENTRAL = pytz.timezone("America/Chicago")
+
+DISPLAY_STATUSES = ("pending", "in_progress", "ready")
+CACHE_SIZE = 16384
+
+
+# --- Timestamps: UTC text from SQLite -> Central time strings ---
+@lru_cache(maxsize=CACHE_SIZE)
+def _local_time(utc_minute, fmt):
+    # Keyed on the minute, so a board full of orders placed in the same few
+    # minutes converts each distinct minute once per process
+    utc_dt = pytz.utc.localize(datetime.strptime(utc_minute, "%Y-%m-%d %H:%M"))
+    return utc_dt.astimezone(CENTRAL).strftime(fmt)
+
+
+def local_times(timestamps, fmt="%I:%M %p"):
+    # Bulk conversion for a whole result set
+    return [_local_time(ts[:16], fmt) for ts in timestamps]
+
+
+# --- Cards: one markdown string per order, memoized on content ---
+@lru_cache(maxsize=CACHE_SIZE)
+def _display_card(customer_name, drink_type, placed):
+    return f"**{customer_name}**\n\n☕ {drink_type}\n🕒 {placed}"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _management_card(order_id, customer_name, drink_type, milk_type, flavors,
+                     drizzle_type, placed, status):
+    return "  \n".join([
+        f"**Order ID:** {order_id}",
+        f"👤 **Name:** {customer_name}",
+        f"☕ **Drink:** {drink_type} with {milk_type} milk",
+        f"🍯 **Flavors:** {flavors}",
+        f"🍫 **Drizzle:** {drizzle_type}",
+        f"📅 **Placed:** {placed}",
+        f"🔖 **Status:** {status}",
+    ])
+
+
+# live_orders.active() hands back the same list object until an order changes,
+# so a rerun with an unchanged board reuses the last columns without looking
+# at a single order. After a change the columns are rebuilt in one pass, with
+# the time conversions and cards coming from the caches above. Callers only
+# read the returned columns.
+_last_display = (None, None)
+
+
+def build_display_columns(orders):
+    # Ordered / Being Prepared / Ready in a single pass over the orders
+    global _last_display
+    last_orders, last_columns = _last_display
+    if orders is last_orders:
+        return last_columns
+    columns = {status: [] for status in DISPLAY_STATUSES}
+    placed = local_times([row["timestamp"] for row in orders])
+    for row, placed_at in zip(orders, placed):
+        column = columns.get(row["status"])
+        if column is not None:
+            column.append(_display_card(row["customer_name"], row["drink_type"], placed_at))
+    _last_display = (orders, columns)
+    return columns
+
+
+def build_management_cards(orders):
+    placed = local_times([row["timestamp"] for row in orders], "%Y-%m-%d %I:%M %p %Z")
+    return [
+        _management_card(
+            row["id"], row["customer_name"], row["drink_type"], row["milk_type"],
+            row["flavors"], row["drizzle_type"], placed_at, row["status"],
+        )
+        for row, placed_at in zip(orders, placed)
+    ]
@@ -0,0 +1,118 @@
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+
+import db
+
+# Read-only snapshot of each shard for display screens and read-only
+# endpoints (see db.use_replica). The refresher compares the primary's change
+# cursor with the replica's every REFRESH_INTERVAL, or right after a commit in
+# this process, and only copies when an order was written; the copy is
+# SQLite's online backup into a WAL-mode file, so readers of the replica keep
+# going while it is rewritten and never touch the primary's locks or WAL.
+REFRESH_INTERVAL = max(0.1, db.REPLICA_MAX_STALENESS / 4)
+# During a rush every commit would trigger a full copy; space them out
+MIN_REFRESH_GAP = REFRESH_INTERVAL / 2
+
+
+def _open_target(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")  # a lost replica is rebuilt from the primary
+    return conn
+
+
+def replica_cursor(shard):
+    # The replica carries its own copy of order_change_seq
+    try:
+        with shard.get_replica_pool().connection() as conn:
+            return db.current_change_seq(conn)
+    except sqlite3.Error:
+        # Not created yet, or mid-first-copy
+        return None
+
+
+# --- Bring one site's replica up to date; returns True if it copied ---
+def refresh(force=False):
+    shard = db.get_shard()
+    checked_at = time.monotonic()
+    primary = db.current_cursor()
+    if not force and replica_cursor(shard) == primary:
+        shard.replica_current_at = checked_at
+        return False
+
+    target = _open_target(shard.replica_path)
+    try:
+        with db.connection() as source:
+            # One step: the whole copy reads a single consistent snapshot
+            source.backup(target)
+    finally:
+        target.close()
+    shard.replica_current_at = checked_at
+    return True
+
+
+def replica_status():
+    shard = db.get_shard()
+    age = shard.replica_age()
+    return {
+        "path": shard.replica_path,
+        "max_staleness_seconds": db.REPLICA_MAX_STALENESS,
+        "age_seconds": None if age is None else round(age, 3),
+        "fresh": shard.replica_fresh(),
+        "cursor": replica_cursor(shard),
+    }
+
+
+# --- Automatic refreshes: one background thread per process, all sites ---
+_thread = None
+_thread_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def _run_forever(interval):
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+        for site in db.sites():
+            try:
+                with db.use_site(site):
+                    refresh()
+            except sqlite3.Error:
+                # Busy or locked: readers fall back to the primary until the next pass
+                pass
+        time.sleep(MIN_REFRESH_GAP)
+
+
+def start_background(interval=REFRESH_INTERVAL):
+    global _thread
+    if db.REPLICA_MAX_STALENESS <= 0:
+        return
+    with _thread_lock:
+        if _thread is None:
+            db.on_commit(lambda site: _wake.set())
+            _thread = threading.Thread(
+                target=_run_forever, args=(interval,), name="replica-refresher", daemon=True
+            )
+            _thread.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh or inspect the read replica")
+    parser.add_argument("command", choices=["refresh", "status"])
+    parser.add_argument("--site", choices=db.sites(), default=db.DEFAULT_SITE)
+    args = parser.parse_args()
+
+    db.set_site(args.site)
+    db.migrate()
+    if args.command == "refresh":
+        refresh(force=True)
+    status = replica_status()
+    print(f"{status['path']}: cursor {status['cursor']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
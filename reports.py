@@ -0,0 +1,168 @@
+import argparse
+import sys
+
+import db
+
+# Reads come from precomputed rollups kept current by triggers on every order
+# write (see db._add_order_rollups and db._add_usage_counters), so each query
+# costs O(days) or O(intervals in range) rows, never a scan of the history.
+# Days and intervals are UTC, like the order timestamps.
+
+
+def _day_range(column, start_day, end_day, params):
+    clauses = []
+    if start_day is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(str(start_day))
+    if end_day is not None:
+        # Inclusive end day; interval buckets of that day sort below day + "~"
+        clauses.append(f"{column} <= ?")
+        params.append(f"{end_day}~")
+    return clauses
+
+
+# --- Orders per day ---
+def daily_orders(start_day=None, end_day=None):
+    params = ["day"]
+    clauses = ["granularity = ?", *_day_range("bucket", start_day, end_day, params)]
+    with db.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT bucket AS day, orders, cancelled
+            FROM order_rollups
+            WHERE {' AND '.join(clauses)}
+            ORDER BY bucket
+        """, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+# --- Busiest 15-minute intervals ---
+def busiest_intervals(start_day=None, end_day=None, limit=10):
+    params = ["interval"]
+    clauses = ["granularity = ?", "orders > 0", *_day_range("bucket", start_day, end_day, params)]
+    params.append(limit)
+    with db.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT bucket AS interval_start, orders
+            FROM order_rollups
+            WHERE {' AND '.join(clauses)}
+            ORDER BY orders DESC, bucket DESC
+            LIMIT ?
+        """, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+# --- Per-day option usage (milk, drink mix, ...) from the usage counters ---
+def usage_trend(field, start_day=None, end_day=None):
+    # {day: {option: uses}}, days in order
+    if field not in db.USAGE_FIELDS:
+        raise ValueError(f"Unknown usage field: {field}")
+    params = [field]
+    clauses = ["field = ?", "uses != 0", *_day_range("day", start_day, end_day, params)]
+    with db.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT day, option, uses
+            FROM usage_counters
+            WHERE {' AND '.join(clauses)}
+            ORDER BY day, option
+        """, params).fetchall()
+    trend = {}
+    for row in rows:
+        trend.setdefault(row["day"], {})[row["option"]] = row["uses"]
+    return trend
+
+
+def milk_usage_trend(start_day=None, end_day=None):
+    return usage_trend("milk_type", start_day, end_day)
+
+
+# --- All sites: the same reports fanned out to every shard and merged ---
+def daily_orders_all_sites(start_day=None, end_day=None):
+    totals = {}
+    for rows in db.fan_out(daily_orders, start_day, end_day).values():
+        for row in rows:
+            day = totals.setdefault(row["day"], {"day": row["day"], "orders": 0, "cancelled": 0})
+            day["orders"] += row["orders"]
+            day["cancelled"] += row["cancelled"]
+    return [totals[day] for day in sorted(totals)]
+
+
+def busiest_intervals_all_sites(start_day=None, end_day=None, limit=10):
+    # Needs every interval from each shard: one site's quiet slot can still
+    # make the combined top list
+    totals = {}
+    for rows in db.fan_out(busiest_intervals, start_day, end_day, limit=-1).values():
+        for row in rows:
+            totals[row["interval_start"]] = totals.get(row["interval_start"], 0) + row["orders"]
+    ranked = sorted(totals.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    return [{"interval_start": bucket, "orders": orders} for bucket, orders in ranked[:limit]]
+
+
+def usage_trend_all_sites(field, start_day=None, end_day=None):
+    if field not in db.USAGE_FIELDS:
+        raise ValueError(f"Unknown usage field: {field}")
+    trend = {}
+    for site_trend in db.fan_out(usage_trend, field, start_day, end_day).values():
+        for day, options in site_trend.items():
+            merged = trend.setdefault(day, {})
+            for option, uses in options.items():
+                merged[option] = merged.get(option, 0) + uses
+    return {day: dict(sorted(trend[day].items())) for day in sorted(trend)}
+
+
+# --- Maintenance ---
+def rebuild():
+    with db.transaction() as conn:
+        db.rebuild_order_rollups(conn)
+
+
+def check():
+    # Compare the rollups against a fresh recount; returns the mismatches
+    with db.snapshot() as conn:
+        stored = {
+            (row["granularity"], row["bucket"]): (row["orders"], row["cancelled"])
+            for row in conn.execute(
+                "SELECT * FROM order_rollups WHERE orders != 0 OR cancelled != 0"
+            )
+        }
+        source = db.orders_source(conn)
+        expected = {}
+        for granularity, bucket in db.ROLLUP_BUCKETS.items():
+            for row in conn.execute(f"""
+                SELECT {bucket.format(ts="timestamp")} AS bucket,
+                       SUM(status IS NOT 'cancelled') AS orders,
+                       SUM(status IS 'cancelled') AS cancelled
+                FROM {source}
+                GROUP BY 1
+            """):
+                expected[(granularity, row["bucket"])] = (row["orders"], row["cancelled"])
+
+    return [
+        {"granularity": key[0], "bucket": key[1],
+         "stored": stored.get(key, (0, 0)), "expected": expected.get(key, (0, 0))}
+        for key in sorted(set(stored) | set(expected))
+        if stored.get(key, (0, 0)) != expected.get(key, (0, 0))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporting rollup maintenance")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--site", choices=db.sites(), default=db.DEFAULT_SITE)
+    args = parser.parse_args()
+
+    db.set_site(args.site)
+    db.migrate()
+    if args.command == "rebuild":
+        rebuild()
+        print("Rollups rebuilt from order history.")
+        return 0
+
+    mismatches = check()
+    for m in mismatches:
+        print(f"{m['granularity']} {m['bucket']}: stored {m['stored']}, expected {m['expected']}")
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
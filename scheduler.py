@@ -0,0 +1,177 @@
+import heapq
+import threading
+from datetime import datetime, timedelta
+
+import db
+from menu import flavor_key, menu_cache
+
+# Parallel drink slots per station (e.g. two group heads, one cold-brew tap)
+STATION_CAPACITY = {"espresso": 2, "cold_brew": 1}
+FALLBACK_PREP_SECONDS = 90
+# An in-progress drink is assumed to be about half done
+IN_PROGRESS_REMAINING = 0.5
+# Drinks sharing a station and milk are made together: each extra drink in a
+# batch costs this fraction of its own prep time, up to BATCH_LIMIT drinks.
+BATCH_FACTOR = 0.6
+BATCH_LIMIT = 4
+
+QUEUED_STATUSES = ("pending", "in_progress")
+
+
+def station_for(drink_type):
+    return flavor_key(drink_type)
+
+
+# --- Barista queue: sequencing and estimated ready times ---
+class QueueScheduler:
+    def __init__(self, capacity=None):
+        self.capacity = dict(capacity or STATION_CAPACITY)
+        self.queue = {}
+        self.cursor = None
+        self.plan = {}
+        self.sequence = []
+        self.planned_at = None
+        self.menu_version = None
+        self.prep_seconds = {}
+        self._lock = threading.Lock()
+
+    def _refresh_prep_seconds(self):
+        rows = menu_cache.all_items()
+        if menu_cache.version != self.menu_version:
+            self.prep_seconds = {
+                row["label"]: row.get("prep_seconds") or FALLBACK_PREP_SECONDS
+                for row in rows
+                if row["category"] == "drink"
+            }
+            self.menu_version = menu_cache.version
+            return True
+        return False
+
+    def _sync(self):
+        # Patch the in-memory queue from the change feed; only a cold start
+        # reads the whole active set
+        with db.use_primary():
+            if self.cursor is None:
+                rows, self.cursor = db.fetch_active_with_cursor()
+                self.queue = {row["id"]: dict(row) for row in rows if row["status"] in QUEUED_STATUSES}
+                return True
+            rows, cursor = db.fetch_changes(self.cursor)
+        self.cursor = cursor
+        for row in rows:
+            if row["status"] in QUEUED_STATUSES:
+                self.queue[row["id"]] = dict(row)
+            else:
+                self.queue.pop(row["id"], None)
+        return bool(rows)
+
+    def prep_time(self, order):
+        return self.prep_seconds.get(order["drink_type"], FALLBACK_PREP_SECONDS)
+
+    def _batches(self):
+        # In-progress drinks first, then pending drinks oldest first (FIFO, not
+        # the timestamp DESC order the board is drawn in). A pending drink pulls
+        # later pending drinks with the same station and milk into its batch.
+        in_progress = sorted(
+            (o for o in self.queue.values() if o["status"] == "in_progress"),
+            key=lambda o: (o["timestamp"], o["id"]),
+        )
+        pending = sorted(
+            (o for o in self.queue.values() if o["status"] == "pending"),
+            key=lambda o: (o["timestamp"], o["id"]),
+        )
+        batches = [[o] for o in in_progress]
+        # Same-key pending drinks in FIFO order, consumed as they are batched
+        by_key = {}
+        for order in pending:
+            by_key.setdefault((station_for(order["drink_type"]), order["milk_type"]), []).append(order)
+        taken = {key: 0 for key in by_key}
+        batched = set()
+        for order in pending:
+            if order["id"] in batched:
+                continue
+            key = (station_for(order["drink_type"]), order["milk_type"])
+            same = by_key[key]
+            start = taken[key]
+            batch = [o for o in same[start:start + BATCH_LIMIT] if o["id"] not in batched]
+            taken[key] = start + BATCH_LIMIT
+            batched.update(o["id"] for o in batch)
+            batches.append(batch)
+        return batches
+
+    def _batch_seconds(self, batch):
+        first, rest = batch[0], batch[1:]
+        seconds = self.prep_time(first)
+        if first["status"] == "in_progress":
+            seconds *= IN_PROGRESS_REMAINING
+        return seconds + sum(self.prep_time(o) * BATCH_FACTOR for o in rest)
+
+    def _schedule(self, now):
+        # List scheduling: each batch goes to the earliest free slot of its station
+        slots = {
+            station: [now] * max(1, count) for station, count in self.capacity.items()
+        }
+        for heap in slots.values():
+            heapq.heapify(heap)
+
+        plan = {}
+        sequence = []
+        for batch in self._batches():
+            heap = slots.setdefault(station_for(batch[0]["drink_type"]), [now])
+            start = heapq.heappop(heap)
+            ready = start + timedelta(seconds=self._batch_seconds(batch))
+            heapq.heappush(heap, ready)
+            for order in batch:
+                plan[order["id"]] = ready
+                sequence.append(order["id"])
+        self.plan = plan
+        self.sequence = sequence
+        self.planned_at = now
+
+    def refresh(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            changed = self._sync()
+            changed = self._refresh_prep_seconds() or changed
+            # Re-sequence on any change; otherwise the plan only ages
+            if changed or self.planned_at is None or now - self.planned_at > timedelta(minutes=1):
+                self._schedule(now)
+
+    def estimate(self, order_id, now=None):
+        self.refresh(now)
+        with self._lock:
+            return self.plan.get(order_id)
+
+    def snapshot(self, now=None):
+        self.refresh(now)
+        with self._lock:
+            return [
+                {
+                    "id": order_id,
+                    "customer_name": self.queue[order_id]["customer_name"],
+                    "drink_type": self.queue[order_id]["drink_type"],
+                    "status": self.queue[order_id]["status"],
+                    "station": station_for(self.queue[order_id]["drink_type"]),
+                    "estimated_ready": self.plan[order_id],
+                }
+                for order_id in self.sequence
+            ]
+
+
+queue_scheduler = db.PerSite(QueueScheduler)
+
+
+def estimate_ready(order_id):
+    # UTC datetime the drink should be ready, or None if it's not queued
+    return queue_scheduler.estimate(order_id)
+
+
+def eta_fields(order_id):
+    # ETA fields for a newly queued order, as the order APIs return them
+    ready_at = estimate_ready(order_id)
+    if ready_at is None:
+        return {}
+    wait = max(0, (ready_at - datetime.utcnow()).total_seconds())
+    return {
+        "estimated_ready": ready_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "estimated_wait_minutes": round(wait / 60, 1),
+    }
@@ -0,0 +1,85 @@
+import argparse
+import sys
+
+import db
+
+
+# --- Inventory reads: sum the per-day counters, O(days x options) ---
+def usage_totals(field, start_day=None, end_day=None):
+    if field not in db.USAGE_FIELDS:
+        raise ValueError(f"Unknown usage field: {field}")
+    clauses = ["field = ?", "uses != 0"]
+    params = [field]
+    if start_day is not None:
+        clauses.append("day >= ?")
+        params.append(str(start_day))
+    if end_day is not None:
+        clauses.append("day <= ?")
+        params.append(str(end_day))
+    with db.connection() as conn:
+        rows = conn.execute(f"""
+            SELECT option, SUM(uses) AS total
+            FROM usage_counters
+            WHERE {' AND '.join(clauses)}
+            GROUP BY option
+            HAVING total != 0
+            ORDER BY total DESC, option ASC
+        """, params).fetchall()
+    return [(row["option"], row["total"]) for row in rows]
+
+
+# --- Maintenance ---
+def rebuild():
+    # Backfill from the full order history (e.g. after importing old data)
+    with db.transaction() as conn:
+        db.rebuild_usage_counters(conn)
+
+
+def check():
+    # Compare the counters against a fresh recount; returns the mismatches
+    with db.snapshot() as conn:
+        stored = {
+            (row["day"], row["field"], row["option"]): row["uses"]
+            for row in conn.execute("SELECT * FROM usage_counters WHERE uses != 0")
+        }
+        expected = {}
+        source = db.orders_source(conn)
+        for field in db.USAGE_FIELDS:
+            for row in conn.execute(f"""
+                SELECT date(timestamp) AS day, {field} AS option, COUNT(*) AS uses
+                FROM {source}
+                WHERE {field} IS NOT NULL AND status != 'cancelled'
+                GROUP BY date(timestamp), {field}
+            """):
+                expected[(row["day"], field, row["option"])] = row["uses"]
+
+    return [
+        {"day": key[0], "field": key[1], "option": key[2],
+         "stored": stored.get(key, 0), "expected": expected.get(key, 0)}
+        for key in sorted(set(stored) | set(expected))
+        if stored.get(key, 0) != expected.get(key, 0)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory usage counter maintenance")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--site", choices=db.sites(), default=db.DEFAULT_SITE)
+    args = parser.parse_args()
+
+    db.set_site(args.site)
+    db.migrate()
+    if args.command == "rebuild":
+        rebuild()
+        print("Usage counters rebuilt from order history.")
+        return 0
+
+    mismatches = check()
+    for m in mismatches:
+        print(f"{m['day']} {m['field']}={m['option']!r}: stored {m['stored']}, expected {m['expected']}")
+    print(f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
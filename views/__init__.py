@@ -0,0 +1,41 @@
+import importlib
+import time
+
+import db
+import metrics
+
+# Each page lives in its own module and is imported the first time it is
+# opened, so a rerun only executes (and a cold start only loads) the code and
+# dependencies of the page on screen.
+PAGES = {
+    "Place Order": "place_order",
+    "Customer Display": "customer_display",
+    "New Here?": "new_here",
+    "🔒 Order Management": "order_management",
+}
+
+# Read-only pages: their queries go to the site's replica while it is fresh
+# (see replica.py), so the TV display and reports never touch the primary
+REPLICA_VIEWS = {"customer_display", "reports_view", "inventory"}
+
+# Module -> seconds its first import took in this process
+import_seconds = {}
+
+
+def load(name):
+    module_name = f"{__name__}.{name}"
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    import_seconds.setdefault(name, time.perf_counter() - started)
+    return module
+
+
+def render(name):
+    # Wall time per page shows up in the diagnostics panel and /metrics
+    module = load(name)
+    with metrics.operation(f"page_{name}"):
+        if name in REPLICA_VIEWS:
+            with db.use_replica():
+                module.render()
+        else:
+            module.render()
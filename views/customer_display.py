@@ -0,0 +1,45 @@
+import streamlit as st
+
+from live_orders import replica_live_orders
+from render import build_display_columns
+
+
+def render():
+    st.header("📢 Customer Order Display")
+
+    orders = replica_live_orders.active()
+    if not orders:
+        st.info("No orders yet.")
+    else:
+        # Prepare lists by status (one pass, cached time conversion and cards)
+        columns = build_display_columns(orders)
+        ordered = columns["pending"]
+        preparing = columns["in_progress"]
+        ready = columns["ready"]
+
+        # Display 3 columns
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.subheader("📝 Ordered")
+            if ordered:
+                for o in ordered:
+                    st.info(o)
+            else:
+                st.write("No orders")
+
+        with col2:
+            st.subheader("👨‍🍳 Being Prepared")
+            if preparing:
+                for p in preparing:
+                    st.warning(p)
+            else:
+                st.write("No orders")
+
+        with col3:
+            st.subheader("✅ Ready")
+            if ready:
+                for r in ready:
+                    st.success(r)
+            else:
+                st.write("No orders")
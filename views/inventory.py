@@ -0,0 +1,37 @@
+import streamlit as st
+
+from usage import usage_totals
+
+
+def render():
+    st.subheader("📦 Inventory / Usage Overview")
+
+    # Counters are kept current on every order write (see usage.py)
+    def usage_table(field, option_label, count_label):
+        return [
+            {option_label: option, count_label: total}
+            for option, total in usage_totals(field)
+        ]
+
+    drink_summary = usage_table("drink_type", "drink_type", "Total Orders")
+    if not drink_summary:
+        st.info("No orders yet.")
+    else:
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("### ☕ Drinks Used")
+            st.dataframe(drink_summary, use_container_width=True)
+
+            st.markdown("### 🥛 Milk Types Used")
+            milk_summary = usage_table("milk_type", "milk_type", "Total Uses")
+            st.dataframe(milk_summary, use_container_width=True)
+
+        with col2:
+            st.markdown("### 🍯 Flavors (Syrups) Used")
+            flavor_summary = usage_table("flavors", "flavors", "Total Uses")
+            st.dataframe(flavor_summary, use_container_width=True)
+
+            st.markdown("### 🍫 Drizzles Used")
+            drizzle_summary = usage_table("drizzle_type", "drizzle_type", "Total Uses")
+            st.dataframe(drizzle_summary, use_container_width=True)
@@ -0,0 +1,169 @@
+from math import ceil
+
+import streamlit as st
+
+import db
+import metrics
+from live_orders import live_orders
+from order_pages import PAGE_SIZE, order_pages
+from render import build_management_cards, local_times
+from scheduler import queue_scheduler
+
+
+# --- One page of the management view, from the cached query layer ---
+@metrics.instrumented("get_order_page")
+def get_order_page(statuses=None, search=None, page=1):
+    if statuses == db.ACTIVE_STATUSES:
+        # Active orders come straight from the in-memory live store
+        return live_orders.page(search, page, PAGE_SIZE)
+    return order_pages.page(statuses, search, page, PAGE_SIZE)
+
+# --- Bulk status updates; conflicts are shown after the rerun ---
+@metrics.instrumented("update_statuses")
+def update_statuses(updates):
+    results = db.set_order_statuses(updates)
+    order_pages.invalidate()
+    st.session_state.status_conflicts = [
+        r for r in results if r["outcome"] != "updated"
+    ]
+    return results
+
+
+# --- Page ---
+def render():
+    # ✅ Track whether completed orders are visible
+    if "show_completed_orders" not in st.session_state:
+        st.session_state.show_completed_orders = False
+
+    # -------------------------
+    # 1) Login gate
+    # -------------------------
+    if not st.session_state.volunteer_authenticated:
+        passcode = st.text_input("Enter passcode to manage orders", type="password")
+        if passcode == "2021":
+            st.session_state.volunteer_authenticated = True
+            st.rerun()
+        else:
+            st.warning("Please enter the correct passcode to access management tools.")
+
+    # -------------------------
+    # 2) Authenticated view
+    # -------------------------
+    else:
+        # ✅ Hide/Unhide completed orders button
+        btn_label = (
+            "Unhide completed orders"
+            if not st.session_state.show_completed_orders
+            else "Hide completed orders"
+        )
+        if st.button(btn_label):
+            st.session_state.show_completed_orders = not st.session_state.show_completed_orders
+            st.session_state.manage_page = 1
+            st.rerun()
+
+        search = st.text_input(
+            "Search by name, drink or status",
+            key="manage_search",
+            on_change=lambda: st.session_state.update(manage_page=1),
+        )
+
+        # ✅ Filter out completed/cancelled unless toggled on (in the query),
+        # and draw one page at a time so the widget count stays bounded
+        statuses = None if st.session_state.show_completed_orders else db.ACTIVE_STATUSES
+        page = st.session_state.get("manage_page", 1)
+        orders, total = get_order_page(statuses, search, page)
+        pages = max(1, ceil(total / PAGE_SIZE))
+        if page > pages:
+            # Orders were closed or archived since the last page was drawn
+            page = st.session_state.manage_page = pages
+            orders, total = get_order_page(statuses, search, page)
+
+        if not orders:
+            if search.strip():
+                st.info(f"No orders match “{search.strip()}”.")
+            elif st.session_state.show_completed_orders:
+                st.info("No orders yet.")
+            else:
+                st.info("No active orders (completed orders are hidden).")
+        else:
+            if pages > 1:
+                st.number_input("Page", min_value=1, max_value=pages, step=1, key="manage_page")
+            st.caption(f"{total} orders · page {page} of {pages}")
+
+            # Suggested make order: FIFO, with same-milk drinks batched together
+            with st.expander("📋 Suggested make order"):
+                queue = queue_scheduler.snapshot()
+                placed = local_times([e["estimated_ready"].strftime("%Y-%m-%d %H:%M:%S") for e in queue])
+                for position, (entry, ready_at) in enumerate(zip(queue, placed), start=1):
+                    st.write(
+                        f"{position}. #{entry['id']} {entry['customer_name']} — "
+                        f"{entry['drink_type']} ({entry['station'].replace('_', ' ')}) · ready ~{ready_at}"
+                    )
+
+            # Orders changed by someone else since this page was drawn
+            for conflict in st.session_state.pop("status_conflicts", []):
+                if conflict["outcome"] == "conflict":
+                    st.warning(
+                        f"Order {conflict['id']} was already changed to "
+                        f"'{conflict['status']}' by someone else — not updated."
+                    )
+                else:
+                    st.warning(f"Order {conflict['id']} no longer exists.")
+
+            # A click reruns the script and re-reads orders, so version checks
+            # use the change_seq each order had when the barista last saw it
+            seen_versions = st.session_state.get("seen_versions", {})
+            st.session_state.seen_versions = {row["id"]: row["change_seq"] for row in orders}
+
+            # ✅ Multi-select: apply one transition to a whole tray at once
+            selected_orders = [
+                {"id": row["id"], "version": seen_versions.get(row["id"], row["change_seq"])}
+                for row in orders
+                if st.session_state.get(f"select_{row['id']}")
+            ]
+            st.caption(f"{len(selected_orders)} selected")
+            col1, col2, col3 = st.columns(3)
+            for col, label, status in (
+                (col1, "Mark Selected In Progress", "in_progress"),
+                (col2, "Mark Selected Ready", "ready"),
+                (col3, "Mark Selected Complete", "complete"),
+            ):
+                if col.button(label, disabled=not selected_orders):
+                    update_statuses([dict(o, status=status) for o in selected_orders])
+                    for o in selected_orders:
+                        del st.session_state[f"select_{o['id']}"]
+                    st.rerun()
+            st.markdown("---")
+
+            for row, card in zip(orders, build_management_cards(orders)):
+                st.checkbox("Select", key=f"select_{row['id']}")
+                st.markdown(card)
+
+                version = seen_versions.get(row["id"], row["change_seq"])
+                col1, col2, col3 = st.columns(3)
+                if col1.button("Mark In Progress", key=f"progress_{row['id']}"):
+                    update_statuses([{"id": row["id"], "status": "in_progress", "version": version}])
+                    st.rerun()
+                if col2.button("Mark Ready", key=f"ready_{row['id']}"):
+                    update_statuses([{"id": row["id"], "status": "ready", "version": version}])
+                    st.rerun()
+                if col3.button("Mark Complete", key=f"complete_{row['id']}"):
+                    update_statuses([{"id": row["id"], "status": "complete", "version": version}])
+                    st.rerun()
+
+                st.markdown("---")
+
+        # Hidden diagnostics: open the app with ?diagnostics=1 to show it
+        if st.query_params.get("diagnostics") == "1":
+            with st.expander("🩺 Diagnostics"):
+                st.caption("Timings for this Streamlit process since it started.")
+                st.write("**Operations**")
+                st.dataframe(metrics.operation_summary(), use_container_width=True)
+                st.write("**Queries**")
+                st.dataframe(metrics.query_summary(), use_container_width=True)
+                st.write("**Connection pool**")
+                st.json(db.pool_stats())
+                st.write("**Order page cache**")
+                st.json(order_pages.stats())
+                st.write("**Live order store**")
+                st.json(live_orders.stats())
@@ -0,0 +1,123 @@
+import sqlite3
+
+import streamlit as st
+
+import db
+from menu import menu_cache
+from scheduler import FALLBACK_PREP_SECONDS
+
+
+def render():
+    tab_choice = st.radio(
+        "What would you like to manage?",
+        ["Menu Items"],
+        horizontal=True
+    )
+
+    # =========================
+    # MENU ITEMS
+    # =========================
+    if tab_choice == "Menu Items":
+        st.subheader("🧾 Menu Editor")
+
+        # --- Add New Item ---
+        st.markdown("### ➕ Add a New Menu Item")
+        with st.form(key="add_menu_item_form"):
+            new_label = st.text_input("Item Name")
+            new_category = st.selectbox("Category", ["drink", "milk", "flavor", "drizzle"])
+            add_item = st.form_submit_button("Add to Menu")
+
+            if add_item:
+                if not new_label.strip():
+                    st.error("Item name cannot be empty.")
+                else:
+                    try:
+                        db.add_menu_item(new_category, new_label.strip())
+                        st.success(f"✅ Added '{new_label}' to {new_category}s!")
+                        st.rerun()
+
+                    except sqlite3.IntegrityError:
+                        st.warning("⚠️ This item already exists.")
+
+        # --- Edit Existing Menu Items ---
+        st.markdown("### ✅ Edit Existing Menu Items")
+
+        rows = menu_cache.all_items()
+        cache_stats = menu_cache.stats()
+        st.caption(
+            f"Menu cache v{cache_stats['version']}: "
+            f"{cache_stats['hits']} hits, {cache_stats['misses']} misses"
+        )
+
+        for row in rows:
+            # FLAVORS: Available + Espresso + Cold Brew
+            if row["category"] == "flavor":
+                col1, col2, col3, col4, col5 = st.columns([2.2, 1.4, 1.2, 1.2, 1.2])
+
+                with col1:
+                    st.write(f"**{row['label']}**")
+                with col2:
+                    st.write(f"Category: {row['category']}")
+
+                with col3:
+                    active_val = st.checkbox(
+                        "Available",
+                        value=bool(row["active"]),
+                        key=f"menu_active_{row['id']}",
+                    )
+
+                with col4:
+                    espresso_val = st.checkbox(
+                        "Espresso",
+                        value=bool(row["espresso_enabled"]),
+                        key=f"menu_espresso_{row['id']}",
+                    )
+
+                with col5:
+                    cold_val = st.checkbox(
+                        "Cold Brew",
+                        value=bool(row["cold_brew_enabled"]),
+                        key=f"menu_cold_{row['id']}",
+                    )
+
+                if (
+                    active_val != bool(row["active"])
+                    or espresso_val != bool(row["espresso_enabled"])
+                    or cold_val != bool(row["cold_brew_enabled"])
+                ):
+                    db.update_menu_item(row["id"], active_val, espresso_val, cold_val)
+                    st.rerun()
+
+            # EVERYTHING ELSE: just Available
+            else:
+                col1, col2, col3 = st.columns([2.2, 1.6, 1.2])
+
+                with col1:
+                    st.write(f"**{row['label']}**")
+                with col2:
+                    st.write(f"Category: {row['category']}")
+
+                with col3:
+                    active_val = st.checkbox(
+                        "Available",
+                        value=bool(row["active"]),
+                        key=f"menu_active_{row['id']}",
+                    )
+
+                if active_val != bool(row["active"]):
+                    db.update_menu_item(row["id"], active_val)
+                    st.rerun()
+
+                # Drinks also carry a prep time for the queue scheduler
+                if row["category"] == "drink" and not row["label"].startswith("Please"):
+                    current_prep = row.get("prep_seconds") or FALLBACK_PREP_SECONDS
+                    prep_val = st.number_input(
+                        "Prep time (seconds)",
+                        min_value=10,
+                        max_value=900,
+                        value=int(current_prep),
+                        step=5,
+                        key=f"menu_prep_{row['id']}",
+                    )
+                    if prep_val != current_prep:
+                        db.set_menu_prep_seconds(row["id"], prep_val)
@@ -0,0 +1,13 @@
+import streamlit as st
+
+
+def render():
+    st.header("👋 Welcome to Collective Church!")
+    st.write(
+        "We're so glad you're here. Check out the resources below to learn more about our community:"
+    )
+
+    st.link_button("🙌 I'm New at Collective", "https://www.collectiveomaha.com/im-new")
+    st.link_button("🎥 Watch Services Online", "https://www.collectiveomaha.com/watch")
+
+    st.success("Feel free to grab a coffee and make yourself at home! ☕️")
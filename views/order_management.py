@@ -0,0 +1,30 @@
+import streamlit as st
+
+import views
+
+# Sub-tab -> module; each loads on first use like the top-level pages
+SUBTABS = {
+    "Manage Orders": "manage_orders",
+    "Reports": "reports_view",
+    "Inventory": "inventory",
+    "Menu Settings": "menu_settings",
+}
+
+# What the login warning calls each locked sub-tab
+LOCKED_NAMES = {"Reports": "reports", "Inventory": "inventory", "Menu Settings": "menu settings"}
+
+
+def render():
+    st.header("Order Management")
+
+    if "volunteer_authenticated" not in st.session_state:
+        st.session_state.volunteer_authenticated = False
+
+    # Sub-tabs for Manage Orders, Reports, Inventory, Menu Settings
+    subtab = st.radio("Select View:", list(SUBTABS), horizontal=True, key="management_view")
+
+    # The passcode is entered on Manage Orders; the other sub-tabs need it first
+    if subtab in LOCKED_NAMES and not st.session_state.volunteer_authenticated:
+        st.warning(f"Please enter the passcode in 'Manage Orders' to access {LOCKED_NAMES[subtab]}.")
+        return
+    views.render(SUBTABS[subtab])
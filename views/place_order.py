@@ -0,0 +1,130 @@
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import streamlit as st
+
+import db
+import metrics
+from idempotency import submit_order_once
+from menu import get_active_menu_items, validate_order
+from render import CENTRAL
+from scheduler import estimate_ready
+
+
+# --- Submit a new order; returns (order_id, replayed) ---
+@metrics.instrumented("submit_order")
+def submit_order(name, drink, milk, flavors, drizzle, idempotency_key=None):
+    return submit_order_once(idempotency_key, name, drink, milk, flavors, drizzle, pickup_time="ASAP")
+
+# --- Idempotency key for the order form ---
+# A double-tap (or a retry after a dropped connection) submits the same form
+# again within seconds; it reuses the key, so it maps back to the first order
+RESUBMIT_WINDOW_SECONDS = 120
+
+def order_form_key(fields):
+    previous = st.session_state.get("order_form_key")
+    now = time.time()
+    if previous and previous["fields"] == fields and now - previous["at"] < RESUBMIT_WINDOW_SECONDS:
+        return previous["key"]
+    key = uuid4().hex
+    st.session_state.order_form_key = {"fields": fields, "key": key, "at": now}
+    return key
+
+# --- Submit a group order (cart) in one transaction ---
+@metrics.instrumented("submit_orders")
+def submit_orders(lines):
+    return db.insert_orders([dict(line, pickup_time="ASAP") for line in lines])
+
+# --- Remember when the customer's drink(s) should be ready ---
+def remember_eta(order_ids):
+    estimates = [estimate_ready(order_id) for order_id in order_ids]
+    estimates = [eta for eta in estimates if eta is not None]
+    if estimates:
+        st.session_state.last_eta = max(estimates)
+
+
+# --- Page ---
+def render():
+    st.header("Place Your Coffee Order")
+
+    now = datetime.now(CENTRAL)
+    st.info(f"🕒 Current time (CST): {now.strftime('%I:%M %p')}")
+
+    # ✅ Drink selection OUTSIDE the form so flavor list updates immediately
+    drink = st.selectbox("Drink", get_active_menu_items("drink"), key="drink_choice")
+
+    with st.form(key="order_form"):
+        name = st.text_input("Your Name")
+
+        milk = st.selectbox("Milk Type", get_active_menu_items("milk"))
+        flavors = st.selectbox(
+            "Flavor (syrup)",
+            get_active_menu_items("flavor", drink_type=drink),
+        )
+        drizzle = st.selectbox("Drizzle (topping)", get_active_menu_items("drizzle"))
+
+        col1, col2 = st.columns(2)
+        submit = col1.form_submit_button("Submit Order")
+        add_to_cart = col2.form_submit_button("➕ Add to Group Order")
+
+    # Group/family orders collect drinks here and submit them together
+    if "cart" not in st.session_state:
+        st.session_state.cart = []
+
+    if submit or add_to_cart:
+        line = {
+            "customer_name": name.strip(),
+            "drink_type": drink,
+            "milk_type": milk,
+            "flavors": flavors,
+            "drizzle_type": drizzle,
+        }
+        # Same check as the group order and the API: the menu may have changed
+        # since this page was drawn
+        errors = validate_order(line)
+        if not name.strip():
+            st.error("Please provide your name.")
+        elif drink.startswith("Please") or milk.startswith("Please"):
+            st.error("Please select a drink and milk type before submitting.")
+        elif add_to_cart:
+            st.session_state.cart.append(line)
+            st.rerun()
+        elif errors:
+            st.error("; ".join(errors))
+        else:
+            key = order_form_key((name, drink, milk, flavors, drizzle))
+            order_id, replayed = submit_order(name, drink, milk, flavors, drizzle, idempotency_key=key)
+            remember_eta([order_id])
+            if replayed:
+                st.session_state.order_replayed = order_id
+
+            st.session_state.nav = "Customer Display"
+            st.rerun()
+
+    if st.session_state.cart:
+        st.subheader(f"🛒 Group Order ({len(st.session_state.cart)} drinks)")
+        for line in st.session_state.cart:
+            st.write(
+                f"👤 **{line['customer_name']}** — ☕ {line['drink_type']} with {line['milk_type']} milk, "
+                f"🍯 {line['flavors']}, 🍫 {line['drizzle_type']}"
+            )
+
+        col1, col2 = st.columns(2)
+        if col1.button("Submit Group Order"):
+            # The menu may have changed since drinks were added
+            problems = [
+                (line, validate_order(line)) for line in st.session_state.cart
+            ]
+            problems = [(line, errors) for line, errors in problems if errors]
+            if problems:
+                for line, errors in problems:
+                    st.error(f"{line['customer_name']} ({line['drink_type']}): {'; '.join(errors)}")
+            else:
+                remember_eta(submit_orders(st.session_state.cart))
+                st.session_state.cart = []
+                st.session_state.nav = "Customer Display"
+                st.rerun()
+        if col2.button("Clear Group Order"):
+            st.session_state.cart = []
+            st.rerun()
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from math import ceil
+
+import streamlit as st
+
+import db
+import export
+import metrics
+import reports
+from render import CENTRAL, local_times
+
+
+# --- Get current orders ---
+@metrics.instrumented("get_orders")
+def get_orders(statuses=None, start=None, end=None, limit=None, offset=0):
+    return db.fetch_orders(statuses, start, end, limit, offset)
+
+# --- Start/end of today's service day in Central time ---
+def today_bounds():
+    today = datetime.now(CENTRAL).date()
+    start = CENTRAL.localize(datetime.combine(today, datetime.min.time()))
+    end = CENTRAL.localize(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+    return start, end
+
+
+# --- Page ---
+def render():
+    # Trends read the precomputed rollups, so they cost O(days)
+    st.subheader("📈 Trends")
+    period = st.selectbox("Period", ["Last 7 days", "Last 30 days", "Last 90 days", "All time"], index=1)
+    days_back = {"Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}.get(period)
+    start_day = (datetime.utcnow().date() - timedelta(days=days_back - 1)) if days_back else None
+
+    daily = reports.daily_orders(start_day)
+    if not daily:
+        st.info("No orders in this period.")
+    else:
+        st.write("**Orders per day**")
+        st.bar_chart(
+            {"day": [d["day"] for d in daily], "orders": [d["orders"] for d in daily]},
+            x="day", y="orders",
+        )
+
+        st.write(f"**Busiest {db.ROLLUP_INTERVAL_MINUTES}-minute intervals**")
+        busiest = reports.busiest_intervals(start_day, limit=10)
+        labels = local_times([b["interval_start"] + ":00" for b in busiest], "%a %b %d, %I:%M %p")
+        st.dataframe(
+            [{"interval (CST)": label, "orders": b["orders"]} for label, b in zip(labels, busiest)],
+            use_container_width=True,
+        )
+
+        milk_trend = reports.milk_usage_trend(start_day)
+        if milk_trend:
+            st.write("**Milk usage trend**")
+            st.line_chart([{"day": day, **uses} for day, uses in milk_trend.items()], x="day")
+
+    st.markdown("---")
+    st.subheader("📊 Full Order Export")
+
+    today_only = st.checkbox("Only today's orders")
+    start, end = today_bounds() if today_only else (None, None)
+
+    total = db.count_orders(start=start, end=end)
+    if not total:
+        st.info("No orders yet.")
+    else:
+        # Preview one page at a time; the export itself is streamed
+        page_size = 50
+        pages = ceil(total / page_size)
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1)
+        st.caption(f"{total} orders · page {page} of {pages}")
+        rows = get_orders(start=start, end=end, limit=page_size, offset=(page - 1) * page_size)
+        st.dataframe([dict(row) for row in rows])
+
+        # Build the file only when asked, straight from the streaming export
+        if st.button("Prepare CSV download"):
+            st.session_state.export_csv = (
+                today_only,
+                b"".join(export.iter_csv(start=start, end=end)),
+            )
+        prepared = st.session_state.get("export_csv")
+        if prepared and prepared[0] == today_only:
+            st.download_button(
+                "Download Orders as CSV",
+                prepared[1],
+                "all_orders.csv" if not today_only else "todays_orders.csv",
+                "text/csv",
+                key="download-csv",
+                on_click=lambda: st.session_state.pop("export_csv", None),
+            )
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import streamlit as st
+
+LOGO_PATH = Path(__file__).resolve().parent.parent / "CCO.png"
+
+
+# --- Process-level resources, built once and shared by every session ---
+@st.cache_resource
+def logo():
+    return LOGO_PATH.read_bytes()
+
+
+@st.cache_resource
+def database():
+    # Schema upgrade for every site, the hourly archiver, the replica
+    # refresher and the order journal
+    import archive
+    import db
+    import journal
+    import replica
+
+    db.migrate_all()
+    archive.start_background()
+    replica.start_background()
+    journal.start()
+    return db